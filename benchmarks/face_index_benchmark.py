@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Face Index Benchmark
+Compares recall and query latency of the flat, HNSW and IVF-PQ gallery
+backends on synthetic 512-d face embeddings.
+
+Usage:
+    python benchmarks/face_index_benchmark.py --size 100000 --queries 500
+"""
+
+import os
+import sys
+import time
+import argparse
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from profiles.face_recognition_improved import EMBEDDING_DIM, build_index, configure_index
+
+
+def synthetic_embeddings(size, queries, identities, seed=0):
+    """Clustered unit vectors: several noisy 'photos' per identity, like real avatars"""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(identities, EMBEDDING_DIM)).astype(np.float32)
+    centers /= np.linalg.norm(centers, axis=1, keepdims=True)
+
+    def sample(count):
+        owners = rng.integers(0, identities, size=count)
+        vectors = centers[owners] + rng.normal(scale=0.6 / np.sqrt(EMBEDDING_DIM), size=(count, EMBEDDING_DIM)).astype(np.float32)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    return sample(size).astype(np.float32), sample(queries).astype(np.float32)
+
+
+def recall_at_k(found, truth):
+    hits = sum(len(set(f) & set(t)) for f, t in zip(found, truth))
+    return hits / truth.size
+
+
+def time_search(index, queries, k):
+    started = time.perf_counter()
+    _, found = index.search(queries, k)
+    elapsed = time.perf_counter() - started
+    return found, elapsed / len(queries) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', type=int, default=100000, help='gallery size')
+    parser.add_argument('--queries', type=int, default=500)
+    parser.add_argument('--identities', type=int, default=20000)
+    parser.add_argument('-k', type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"📊 Building {args.size} synthetic embeddings ({args.identities} identities)...")
+    gallery, queries = synthetic_embeddings(args.size, args.queries, args.identities)
+
+    rows = []
+
+    started = time.perf_counter()
+    flat = build_index('flat', gallery)
+    build_s = time.perf_counter() - started
+    truth, latency = time_search(flat, queries, args.k)
+    rows.append(('flat', '-', build_s, latency, 1.0))
+
+    started = time.perf_counter()
+    hnsw = build_index('hnsw', gallery)
+    build_s = time.perf_counter() - started
+    for ef in (16, 32, 64, 128, 256):
+        configure_index(hnsw, ef_search=ef)
+        found, latency = time_search(hnsw, queries, args.k)
+        rows.append(('hnsw', f'efSearch={ef}', build_s, latency, recall_at_k(found, truth)))
+
+    started = time.perf_counter()
+    ivfpq = build_index('ivfpq', gallery)
+    build_s = time.perf_counter() - started
+    for nprobe in (1, 4, 16, 64):
+        configure_index(ivfpq, nprobe=nprobe)
+        found, latency = time_search(ivfpq, queries, args.k)
+        rows.append(('ivfpq', f'nprobe={nprobe}', build_s, latency, recall_at_k(found, truth)))
+
+    print()
+    print(f"{'backend':<8} {'setting':<14} {'build (s)':>10} {'ms/query':>10} {f'recall@{args.k}':>10}")
+    print("-" * 56)
+    for backend, setting, build_s, latency, recall in rows:
+        print(f"{backend:<8} {setting:<14} {build_s:>10.2f} {latency:>10.3f} {recall:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Face Model Benchmark
+Compares InsightFace model packs (detection + recognition only) by load
+time, peak memory and per-image latency. Each pack runs in its own
+process so memory numbers do not leak into each other.
+
+Usage:
+    python benchmarks/face_model_benchmark.py --images 'media/uploads/*.jpg'
+    python benchmarks/face_model_benchmark.py --packs buffalo_s antelopev2 --repeat 5
+"""
+
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+import resource
+import subprocess
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+DEFAULT_PACKS = ['buffalo_l', 'buffalo_s', 'antelopev2']
+
+
+def peak_rss_mb():
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def load_images(pattern, count):
+    from profiles.face_recognition_improved import load_image_from_path
+
+    paths = sorted(glob.glob(pattern))[:count] if pattern else []
+    images = [image for image in (load_image_from_path(path) for path in paths) if image is not None]
+    if not images:
+        # No faces in noise, so this only times detection
+        rng = np.random.default_rng(0)
+        images = [rng.integers(0, 255, size=(480, 640, 3), dtype=np.uint8) for _ in range(count)]
+    return images
+
+
+def measure(pack, pattern, count, repeat):
+    """Benchmark one pack in this process and return a result dict"""
+    from profiles.face_recognition_improved import FaceService
+
+    images = load_images(pattern, count)
+    baseline_mb = peak_rss_mb()
+
+    service = FaceService(model_name=pack, gallery_dir=None)
+    started = time.perf_counter()
+    if not service.initialize():
+        return {'pack': pack, 'error': 'failed to load'}
+    load_s = time.perf_counter() - started
+    loaded_mb = peak_rss_mb()
+
+    # Warm-up run so lazy ONNX Runtime allocations are not timed
+    service.extract_embedding(images[0])
+
+    started = time.perf_counter()
+    faces = 0
+    for _ in range(repeat):
+        for image in images:
+            faces += service.extract_embedding(image) is not None
+    single_ms = (time.perf_counter() - started) / (repeat * len(images)) * 1000
+
+    started = time.perf_counter()
+    for _ in range(repeat):
+        service.embed_batch(images)
+    batch_ms = (time.perf_counter() - started) / (repeat * len(images)) * 1000
+
+    return {
+        'pack': pack,
+        'load_s': load_s,
+        'model_mb': loaded_mb - baseline_mb,
+        'peak_mb': peak_rss_mb(),
+        'single_ms': single_ms,
+        'batch_ms': batch_ms,
+        'face_rate': faces / (repeat * len(images)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--packs', nargs='+', default=DEFAULT_PACKS)
+    parser.add_argument('--images', help='glob of test photos (random noise if omitted)')
+    parser.add_argument('--count', type=int, default=16, help='images per run')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(args.child, args.images, args.count, args.repeat)))
+        return
+
+    rows = []
+    for pack in args.packs:
+        print(f"📊 Benchmarking {pack}...")
+        command = [sys.executable, os.path.abspath(__file__), '--child', pack,
+                   '--count', str(args.count), '--repeat', str(args.repeat)]
+        if args.images:
+            command += ['--images', args.images]
+        result = subprocess.run(command, capture_output=True, text=True, cwd=ROOT)
+        lines = result.stdout.strip().splitlines()
+        try:
+            rows.append(json.loads(lines[-1]))
+        except (IndexError, ValueError):
+            rows.append({'pack': pack, 'error': (result.stderr.strip().splitlines() or ['no output'])[-1]})
+
+    print()
+    print(f"{'pack':<12} {'load (s)':>9} {'model MB':>9} {'peak MB':>9} {'ms/img':>8} {'batched':>8} {'faces':>6}")
+    print("-" * 67)
+    for row in rows:
+        if 'error' in row:
+            print(f"{row['pack']:<12} ❌ {row['error']}")
+            continue
+        print(f"{row['pack']:<12} {row['load_s']:>9.2f} {row['model_mb']:>9.0f} {row['peak_mb']:>9.0f} "
+              f"{row['single_ms']:>8.1f} {row['batch_ms']:>8.1f} {row['face_rate']:>6.0%}")
+
+
+if __name__ == "__main__":
+    main()
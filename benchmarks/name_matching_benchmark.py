@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Name Matching Benchmark
+Times the old difflib-based name similarity against profiles.name_matching
+on synthetic search-name / profile-name pairs, the way one search scores
+its result page.
+
+Usage:
+    python benchmarks/name_matching_benchmark.py --profiles 2000 --searches 50
+"""
+
+import os
+import re
+import sys
+import time
+import random
+import difflib
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from profiles.name_matching import name_similarity, prepare_name, normalize_name
+
+FIRST_NAMES = ['John', 'Jane', 'José', 'Zoë', 'Mohammed', 'Ana-María', 'Li', 'Olivia', 'Søren', 'Priya']
+LAST_NAMES = ['Doe', 'Smith', 'García', 'Müller', "O'Brien", 'Nguyen', 'Kowalski', 'Chen', 'Dubois', 'Patel']
+
+
+def difflib_similarity(str1, str2):
+    """calculate_string_similarity as it was before profiles.name_matching"""
+    if not str1 or not str2:
+        return 0
+    str1 = re.sub(r'[^\w\s]', '', str1.lower().strip())
+    str2 = re.sub(r'[^\w\s]', '', str2.lower().strip())
+    if str1 == str2:
+        return 1.0
+    similarity = difflib.SequenceMatcher(None, str1, str2).ratio()
+    words1 = set(str1.split())
+    words2 = set(str2.split())
+    if words1 and words2:
+        word_overlap = len(words1.intersection(words2)) / max(len(words1), len(words2))
+        similarity = max(similarity, word_overlap * 0.8)
+    return similarity
+
+
+def random_name(rng):
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    if rng.random() < 0.3:
+        name = f"{name} {rng.choice(LAST_NAMES)}"
+    return name.upper() if rng.random() < 0.1 else name
+
+
+def run(similarity, searches, profiles):
+    started = time.perf_counter()
+    for query in searches:
+        for name in profiles:
+            similarity(name, query)
+    return (time.perf_counter() - started) / (len(searches) * len(profiles)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--profiles', type=int, default=2000, help='distinct profile names')
+    parser.add_argument('--searches', type=int, default=50, help='search names scored against every profile')
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    profiles = [random_name(rng) for _ in range(args.profiles)]
+    searches = [random_name(rng) for _ in range(args.searches)]
+
+    rows = [('difflib', run(difflib_similarity, searches, profiles))]
+
+    prepare_name.cache_clear()
+    normalize_name.cache_clear()
+    rows.append(('name_matching (cold)', run(name_similarity, searches[:1], profiles)))
+    rows.append(('name_matching (warm)', run(name_similarity, searches, profiles)))
+
+    print(f"{'implementation':<22} {'µs/pair':>8}")
+    print("-" * 31)
+    for label, micros in rows:
+        print(f"{label:<22} {micros:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -14,3 +14,7 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'person_profile_tracker.settings')
 
 application = get_asgi_application()
+
+# Serving processes preload the face models so the first photo search doesn't wait
+from profiles.apps import warm_up_face_models
+warm_up_face_models()
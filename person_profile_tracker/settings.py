@@ -84,6 +84,29 @@ DATABASES = {
 }
 
 
+# Caches
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+# The "search" cache holds SerpAPI responses; point it at a file or DB cache so
+# entries survive restarts and are shared between worker processes.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'search': {
+        'BACKEND': os.environ.get('SEARCH_CACHE_BACKEND', 'django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': os.environ.get('SEARCH_CACHE_LOCATION', os.path.join(BASE_DIR, 'cache', 'search')),
+        'TIMEOUT': None,
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    },
+}
+
+SEARCH_CACHE_ALIAS = 'search'
+SERPAPI_CACHE_TIMEOUT = int(os.environ.get('SERPAPI_CACHE_TIMEOUT', 6 * 3600))
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -16,13 +16,15 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path
-from profiles.views import candidate_search
+from profiles.views import candidate_search, candidate_search_stream, search_job_status
 from django.conf import settings
 from django.conf.urls.static import static
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', candidate_search, name='candidate_search'),
+    path('search/stream/', candidate_search_stream, name='candidate_search_stream'),
+    path('search/jobs/<uuid:job_id>/', search_job_status, name='search_job_status'),
 ]
 
 if settings.DEBUG:
@@ -1,6 +1,21 @@
+import os
 from django.apps import AppConfig
 
 
+def warm_up_face_models():
+    """Start loading the InsightFace models on a background thread.
+    
+    Called by wsgi.py and asgi.py (runserver loads wsgi.py too), so only
+    processes that serve requests preload the models; management commands,
+    tests and scripts that call django.setup() load them on first use.
+    FACE_WARMUP=0 disables it.
+    """
+    if os.environ.get('FACE_WARMUP', '1') == '0':
+        return
+    from .face_recognition_improved import start_background_warmup
+    start_background_warmup()
+
+
 class ProfilesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'profiles'
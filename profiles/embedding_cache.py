@@ -0,0 +1,152 @@
+import os
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# -------------------------------
+# CONFIGURATION
+# -------------------------------
+DEFAULT_CACHE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'face_embeddings.sqlite3'
+)
+EMBEDDING_CACHE_PATH = os.environ.get("FACE_EMBEDDING_CACHE_PATH", DEFAULT_CACHE_PATH)  # "" disables the cache
+EMBEDDING_CACHE_TTL = int(os.environ.get("FACE_EMBEDDING_CACHE_TTL", str(7 * 24 * 3600)))  # seconds before revalidation
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.environ.get("FACE_EMBEDDING_CACHE_MAX_ENTRIES", "50000"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS embeddings (
+    url TEXT NOT NULL,
+    model TEXT NOT NULL,
+    etag TEXT,
+    content_hash TEXT NOT NULL,
+    embedding BLOB,
+    created_at REAL NOT NULL,
+    last_access REAL NOT NULL,
+    PRIMARY KEY (url, model)
+);
+CREATE INDEX IF NOT EXISTS embeddings_last_access ON embeddings (last_access);
+"""
+
+
+def content_hash(data):
+    """SHA-256 of the raw image bytes, used to detect avatars that did not change"""
+    return hashlib.sha256(data).hexdigest()
+
+
+class CacheEntry:
+    """A cached embedding; embedding is None when the image had no detectable face"""
+
+    def __init__(self, url, etag, content_hash, embedding, created_at):
+        self.url = url
+        self.etag = etag
+        self.content_hash = content_hash
+        self.embedding = embedding
+        self.created_at = created_at
+
+    def is_fresh(self, ttl):
+        return time.time() - self.created_at < ttl
+
+
+class EmbeddingCache:
+    """SQLite-backed cache of float32 face embeddings keyed by image URL and model.
+
+    Entries younger than ``ttl`` are served without any network access. Older
+    entries are revalidated by ETag or content hash, so an unchanged avatar
+    never goes through the CNN again. The table is trimmed to ``max_entries``
+    rows, evicting the least recently used first.
+    """
+
+    def __init__(self, path=EMBEDDING_CACHE_PATH, ttl=EMBEDDING_CACHE_TTL, max_entries=EMBEDDING_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def get(self, url, model):
+        """Return the CacheEntry for url, fresh or not, or None on a miss"""
+        try:
+            row = self._connection().execute(
+                "SELECT etag, content_hash, embedding, created_at FROM embeddings WHERE url = ? AND model = ?",
+                (url, model)
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.error(f"Embedding cache read failed for {url}: {e}")
+            return None
+        if row is None:
+            return None
+        etag, digest, blob, created_at = row
+        embedding = np.frombuffer(blob, dtype=np.float32) if blob is not None else None
+        return CacheEntry(url, etag, digest, embedding, created_at)
+
+    def touch(self, url, model, revalidated=False):
+        """Record a hit; a revalidated entry also restarts its TTL"""
+        now = time.time()
+        try:
+            with self._connection() as conn:
+                if revalidated:
+                    conn.execute(
+                        "UPDATE embeddings SET last_access = ?, created_at = ? WHERE url = ? AND model = ?",
+                        (now, now, url, model)
+                    )
+                else:
+                    conn.execute(
+                        "UPDATE embeddings SET last_access = ? WHERE url = ? AND model = ?",
+                        (now, url, model)
+                    )
+        except sqlite3.Error as e:
+            logger.error(f"Embedding cache update failed for {url}: {e}")
+
+    def put(self, url, model, etag, digest, embedding):
+        """Store an embedding (or None for "no face") and evict LRU entries over the limit"""
+        now = time.time()
+        blob = None
+        if embedding is not None:
+            blob = np.ascontiguousarray(embedding, dtype=np.float32).tobytes()
+        try:
+            with self._connection() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO embeddings (url, model, etag, content_hash, embedding, created_at, last_access) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (url, model, etag, digest, blob, now, now)
+                )
+                conn.execute(
+                    "DELETE FROM embeddings WHERE rowid IN ("
+                    "SELECT rowid FROM embeddings ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,)
+                )
+        except sqlite3.Error as e:
+            logger.error(f"Embedding cache write failed for {url}: {e}")
+
+    def clear(self):
+        with self._connection() as conn:
+            conn.execute("DELETE FROM embeddings")
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_embedding_cache():
+    """Process-wide EmbeddingCache, or None when FACE_EMBEDDING_CACHE_PATH is empty"""
+    global _cache
+    if not EMBEDDING_CACHE_PATH:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = EmbeddingCache()
+    return _cache
@@ -0,0 +1,194 @@
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from django.db import connections
+from django.utils import timezone
+from .http_client import RateLimiter, install_rate_limiter, parse_rate_limits
+from .models import Candidate, EnrichmentCheckpoint, SearchQuery
+from .search_store import is_fresh, photo_hash, query_fingerprint, store_results
+
+# Candidates searched at once, and candidates read from the database per query
+ENRICH_WORKERS = int(os.environ.get("ENRICH_WORKERS", "4"))
+ENRICH_CHUNK_SIZE = int(os.environ.get("ENRICH_CHUNK_SIZE", "200"))
+
+# Per upstream host during a run: requests in flight at once / minimum seconds
+# between the start of two requests (see http_client.parse_rate_limits)
+ENRICH_RATE_LIMITS = parse_rate_limits(os.environ.get(
+    "ENRICH_RATE_LIMITS", "api.github.com=2/0.5,serpapi.com=2/1,linkedin.com=1/2,api.twitter.com=1/1"))
+
+# Candidate fields that make up its search (the form's fields without the photo)
+SEARCH_FIELDS = (
+    'name', 'country', 'city', 'profession', 'date_of_birth', 'primary_email', 'secondary_email',
+    'linkedin_profile', 'github_profile', 'facebook_profile', 'instagram_profile', 'twitter_profile',
+    'youtube_profile', 'pinterest_profile', 'reddit_profile', 'medium_profile', 'quora_profile', 'company',
+)
+
+
+def candidate_search_data(candidate):
+    return {field: getattr(candidate, field) for field in SEARCH_FIELDS}
+
+
+def read_candidate_photo(candidate):
+    if not candidate.profile_photo:
+        return None
+    with candidate.profile_photo.open('rb') as photo:
+        return photo.read()
+
+
+def has_fresh_results(search_data, photo_digest=''):
+    query = SearchQuery.objects.filter(fingerprint=query_fingerprint(search_data, photo_digest)).first()
+    return query is not None and is_fresh(query)
+
+
+def run_candidate_search(search_data, photo_bytes):
+    """Sorted, scored results of one candidate's search; runs on a pool thread.
+
+    Every provider is waited for (no deadline): the rate limits may queue
+    requests far longer than an interactive search would allow. Raises if
+    any provider failed, so partial results are never stored as fresh.
+    """
+    # Imported here because views imports the models this module uses
+    from .views import build_query_embedding, iter_search_results, result_sort_key
+
+    try:
+        query_embedding = build_query_embedding(photo_bytes)
+        results = []
+        failed = []
+        for platform, profiles in iter_search_results(search_data, query_embedding, deadline=None, failed=failed):
+            results.extend(profiles)
+        if failed:
+            raise RuntimeError(f"search failed on {', '.join(failed)}")
+        results.sort(key=result_sort_key)
+        return results
+    finally:
+        # Pool threads outlive the task; don't leave their connections open
+        connections.close_all()
+
+
+def load_checkpoint(name, restart=False):
+    checkpoint, created = EnrichmentCheckpoint.objects.get_or_create(name=name)
+    if restart and not created:
+        checkpoint.last_candidate_id = 0
+        checkpoint.processed = 0
+        checkpoint.failed_ids = []
+        checkpoint.finished_at = None
+        checkpoint.save()
+    return checkpoint
+
+
+def iter_candidates(after_id, chunk_size=ENRICH_CHUNK_SIZE):
+    """Candidates with pk > after_id in pk order, read chunk_size rows per query"""
+    while True:
+        chunk = list(Candidate.objects.filter(pk__gt=after_id).order_by('pk')[:chunk_size])
+        if not chunk:
+            return
+        yield from chunk
+        after_id = chunk[-1].pk
+
+
+def enrich_candidates(checkpoint, limiter=None, workers=ENRICH_WORKERS, chunk_size=ENRICH_CHUNK_SIZE,
+                      use_photos=True, skip_fresh=True, retry_failed=False, limit=0, report=None):
+    """Search every candidate after the checkpoint and store each one's results as it finishes.
+
+    Searches run on a pool of workers threads, at most twice that many in
+    flight, so only a bounded window of candidates is in memory. Results
+    are written (search_store.store_results) and the checkpoint advanced
+    from this thread as each search completes; the checkpoint only moves
+    past a candidate once every candidate before it is done, so a crashed
+    run resumes without gaps. Failed candidates are recorded on the
+    checkpoint and retried with retry_failed.
+
+    limiter (an http_client.RateLimiter, ENRICH_RATE_LIMITS by default) is
+    installed process-wide for the run, so every upstream request a search
+    makes waits for its host's slot.
+
+    report(candidate, status, detail) is called with status 'done',
+    'skipped' or 'failed'. Returns counts per status.
+    """
+    limiter = limiter or RateLimiter(ENRICH_RATE_LIMITS)
+    stats = {'done': 0, 'skipped': 0, 'failed': 0}
+    failed_ids = set(checkpoint.failed_ids)
+
+    def candidates():
+        if retry_failed and failed_ids:
+            # Failures past the watermark were never passed by it; the main pass reaches them
+            retry_ids = Candidate.objects.filter(pk__in=failed_ids, pk__lte=checkpoint.last_candidate_id)
+            for candidate in retry_ids.order_by('pk'):
+                yield candidate, True
+        for candidate in iter_candidates(checkpoint.last_candidate_id, chunk_size):
+            yield candidate, False
+
+    in_flight = {}
+    pending_ids = deque()
+    finished_ids = set()
+
+    def finish(candidate, retry, status, detail=''):
+        stats[status] += 1
+        if status == 'failed':
+            failed_ids.add(candidate.pk)
+        else:
+            failed_ids.discard(candidate.pk)
+        if not retry:
+            finished_ids.add(candidate.pk)
+            while pending_ids and pending_ids[0] in finished_ids:
+                checkpoint.last_candidate_id = pending_ids.popleft()
+                finished_ids.discard(checkpoint.last_candidate_id)
+        checkpoint.processed += 1
+        checkpoint.failed_ids = sorted(failed_ids)
+        checkpoint.save(update_fields=['last_candidate_id', 'processed', 'failed_ids', 'updated_at'])
+        if report:
+            report(candidate, status, detail)
+
+    source = candidates()
+    submitted = 0
+    exhausted = False
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='enrich')
+    previous_limiter = install_rate_limiter(limiter)
+    try:
+        while True:
+            while not exhausted and len(in_flight) < workers * 2:
+                if limit and submitted >= limit:
+                    exhausted = True
+                    break
+                item = next(source, None)
+                if item is None:
+                    exhausted = True
+                    break
+                candidate, retry = item
+                submitted += 1
+                if not retry:
+                    pending_ids.append(candidate.pk)
+                try:
+                    search_data = candidate_search_data(candidate)
+                    photo_bytes = read_candidate_photo(candidate) if use_photos else None
+                    digest = photo_hash(photo_bytes)
+                    if skip_fresh and has_fresh_results(search_data, digest):
+                        finish(candidate, retry, 'skipped', 'fresh results stored')
+                        continue
+                except Exception as e:
+                    finish(candidate, retry, 'failed', str(e))
+                    continue
+                future = executor.submit(run_candidate_search, search_data, photo_bytes)
+                in_flight[future] = (candidate, retry, search_data, digest)
+
+            if not in_flight:
+                break
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                candidate, retry, search_data, digest = in_flight.pop(future)
+                try:
+                    results = future.result()
+                    photo_name = candidate.profile_photo.name if use_photos and candidate.profile_photo else None
+                    store_results(search_data, results, digest, photo_name)
+                except Exception as e:
+                    finish(candidate, retry, 'failed', str(e))
+                else:
+                    finish(candidate, retry, 'done', f"{len(results)} results")
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+        install_rate_limiter(previous_limiter)
+
+    if not limit or submitted < limit:
+        checkpoint.finished_at = timezone.now()
+        checkpoint.save(update_fields=['finished_at', 'updated_at'])
+    return stats
@@ -1,12 +1,17 @@
 import os
 import numpy as np
-from PIL import Image
-import requests
+from PIL import Image, ImageOps
 from io import BytesIO
+import json
+import time
 import logging
-from insightface.app import FaceAnalysis
+import atexit
+import threading
+from contextlib import contextmanager
 import faiss
 import cv2
+from .embedding_cache import get_embedding_cache, content_hash
+from .http_client import http_get
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -15,99 +20,1212 @@ logger = logging.getLogger(__name__)
 # -------------------------------
 # CONFIGURATION
 # -------------------------------
+# InsightFace model pack: buffalo_l (most accurate), buffalo_s (small, fast) or antelopev2
+MODEL_NAME = os.environ.get("FACE_MODEL_PACK", "buffalo_l")
+# Only these modules of the pack are loaded; scoring never uses landmarks or gender/age
+MODEL_MODULES = ('detection', 'recognition')
 EMBEDDING_DIM = 512
 DEVICE_ID = -1  # -1 = CPU, >=0 = GPU
 SIMILARITY_THRESHOLD = 0.6  # Minimum similarity score to consider a match
 
+# Batched inference: aligned crops per recognition run, and ONNX Runtime
+# intra-op threads per model session (0 = one per CPU core)
+FACE_BATCH_SIZE = int(os.environ.get("FACE_BATCH_SIZE", "32"))
+FACE_INTRA_OP_THREADS = int(os.environ.get("FACE_INTRA_OP_THREADS", "0"))
+
+# Images are downscaled to fit this box before detection (the detector's
+# working size); larger inputs only cost decode time and memory
+DETECTION_MAX_SIDE = int(os.environ.get("FACE_DETECTION_MAX_SIDE", "640"))
+
+# Persistent gallery of every profile face we have embedded, one per model
+# pack (GALLERY_DIR/<pack>/): embeddings of different packs are not comparable
+GALLERY_DIR = os.environ.get(
+    "FACE_GALLERY_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'face_gallery')
+)
+GALLERY_INDEX_FILE = 'faces.index'
+GALLERY_META_FILE = 'faces.json'
+# Galleries saved before the pack was configurable sit directly in GALLERY_DIR
+LEGACY_GALLERY_MODEL = 'buffalo_l'
+
+# Gallery index backend: flat (exact), hnsw, ivfpq (flat until it has enough
+# faces to train, ~24k with the default nlist; see ivfpq_min_faces), or auto
+# (flat until GALLERY_AUTO_THRESHOLD faces, then HNSW)
+GALLERY_INDEX_TYPE = os.environ.get("FACE_INDEX_TYPE", "auto").lower()
+GALLERY_AUTO_THRESHOLD = int(os.environ.get("FACE_INDEX_AUTO_THRESHOLD", "50000"))
+HNSW_M = int(os.environ.get("FACE_HNSW_M", "32"))
+HNSW_EF_CONSTRUCTION = int(os.environ.get("FACE_HNSW_EF_CONSTRUCTION", "200"))
+HNSW_EF_SEARCH = int(os.environ.get("FACE_HNSW_EF_SEARCH", "64"))
+IVF_NLIST = int(os.environ.get("FACE_IVF_NLIST", "0"))  # 0 = about 4*sqrt(N)
+IVF_NPROBE = int(os.environ.get("FACE_IVF_NPROBE", "16"))
+IVF_PQ_M = int(os.environ.get("FACE_IVF_PQ_M", "64"))  # sub-quantizers; must divide EMBEDDING_DIM
+
+# Gallery changes are written to disk every GALLERY_SAVE_EVERY changes or
+# GALLERY_SAVE_INTERVAL seconds (and at exit), not after every search
+GALLERY_SAVE_EVERY = int(os.environ.get("FACE_GALLERY_SAVE_EVERY", "500"))
+GALLERY_SAVE_INTERVAL = float(os.environ.get("FACE_GALLERY_SAVE_INTERVAL", "60"))
+
+# HNSW cannot delete vectors: removed faces are skipped at search time and
+# the index is compacted in the background once they exceed this share of it
+GALLERY_COMPACT_FRACTION = float(os.environ.get("FACE_GALLERY_COMPACT_FRACTION", "0.1"))
+
+# Memory bounds: the oldest faces are evicted past these sizes (0 = unbounded)
+GALLERY_MAX_FACES = int(os.environ.get("FACE_GALLERY_MAX_FACES", "100000"))
+REGISTERED_FACES_MAX = int(os.environ.get("FACE_REGISTERED_MAX", "10000"))
+
 # -------------------------------
-# GLOBAL FACE ANALYSIS + FAISS
+# FACE SERVICE
 # -------------------------------
-face_app = None
-faiss_index = None
-id_map = []
+class FaceService:
+    """Face models plus the shared gallery and registered faces.
 
-def initialize_face_recognition():
-    """Initialize the face recognition system"""
-    global face_app, faiss_index
-    
-    try:
-        # Initialize InsightFace
-        face_app = FaceAnalysis(name='buffalo_l', providers=['CPUExecutionProvider'])
-        face_app.prepare(ctx_id=DEVICE_ID)
+    One instance is shared by every thread of a process. The model is loaded
+    once and only read afterwards (onnxruntime sessions can run concurrently),
+    the galleries are read-mostly and guarded by read-write locks, and anything
+    specific to one search lives in the QueryEmbedding returned by query_*.
+    """
+
+    def __init__(self, model_name=MODEL_NAME, gallery_dir=GALLERY_DIR):
+        self.model_name = model_name
+        self.face_app = None
+        # Model loading state: idle -> loading -> ready | failed
+        self.state = 'idle'
+        self._init_lock = threading.Lock()
+        # Guards state and _init_done, which change together
+        self._state_lock = threading.Lock()
+        self._init_done = threading.Event()
+        # gallery_dir=None keeps the gallery in memory only (nothing is loaded or saved)
+        self.gallery = FaceGallery(
+            os.path.join(gallery_dir, model_name) if gallery_dir else None,
+            max_faces=GALLERY_MAX_FACES, model=model_name,
+            legacy_directory=gallery_dir if gallery_dir and model_name == LEGACY_GALLERY_MODEL else None,
+        )
+        self.registered = FaceGallery(max_faces=REGISTERED_FACES_MAX, auto_switch=False, name='registered faces')
+        # Changes not yet due for saving are written when the process exits
+        atexit.register(self.gallery.save, force=True)
+
+    def initialize(self):
+        """Load the models (blocking; safe to call from several threads)"""
+        with self._init_lock:
+            if self.is_initialized():
+                return True
+            self._begin_attempt(force=True)
+            ready = False
+            try:
+                # Imported here so that processes which never match faces don't pay for it
+                import onnxruntime
+                from insightface.app import FaceAnalysis
+                
+                sess_options = onnxruntime.SessionOptions()
+                sess_options.intra_op_num_threads = FACE_INTRA_OP_THREADS
+                app = FaceAnalysis(name=self.model_name, allowed_modules=list(MODEL_MODULES),
+                                   providers=['CPUExecutionProvider'], sess_options=sess_options)
+                app.prepare(ctx_id=DEVICE_ID)
+                self.face_app = app
+                ready = True
+                logger.info(f"✅ Face recognition system initialized successfully ({self.model_name})")
+            except Exception as e:
+                logger.error(f"❌ Failed to initialize face recognition: {e}")
+            finally:
+                with self._state_lock:
+                    self.state = 'ready' if ready else 'failed'
+                    self._init_done.set()
+            return ready
+
+    def _begin_attempt(self, force=False):
+        """Mark a load as started so waiters block until it ends; False if one is running or done"""
+        with self._state_lock:
+            if not force and self.state in ('loading', 'ready'):
+                return False
+            self.state = 'loading'
+            # Left set by a failed attempt, which would let waiters return before this one ends
+            self._init_done.clear()
+            return True
+
+    def start_background_warmup(self):
+        """Load the models on a daemon thread; returns immediately"""
+        if not self._begin_attempt():
+            return
+        thread = threading.Thread(target=self.initialize, name='face-model-warmup', daemon=True)
+        thread.start()
+        logger.info("⏳ Loading face recognition models in the background")
+
+    def ensure_initialized(self, timeout=None):
+        """Wait up to timeout seconds for the models, starting the load if nobody has yet"""
+        if self.is_initialized():
+            return True
+        if self.state in ('idle', 'failed'):
+            self.start_background_warmup()
+        self._init_done.wait(timeout)
+        return self.is_initialized()
+
+    def is_initialized(self):
+        return self.face_app is not None
+
+    def extract_embedding(self, image_np):
+        """Raw embedding of the first face in image_np, or None"""
+        try:
+            faces = self.face_app.get(image_np)
+            if not faces:
+                return None
+            return faces[0]["embedding"]
+        except Exception as e:
+            logger.error(f"Failed to extract embedding: {e}")
+            return None
+
+    def embed_batch(self, images, batch_size=None, return_failed=False):
+        """Normalized embeddings of the first face in each image; NaN rows where there is none.
+
+        Detection still runs per image, but the aligned crops are stacked and
+        sent through the recognition model batch_size at a time, so N avatars
+        cost N / batch_size recognizer runs instead of N. With return_failed,
+        also returns a boolean mask of the rows that are NaN because something
+        went wrong (missing image, detector or recognizer error) rather than
+        because the image has no face.
+        """
+        from insightface.utils import face_align
         
-        # Initialize FAISS index
-        faiss_index = faiss.IndexFlatIP(EMBEDDING_DIM)  # Cosine similarity
+        batch_size = batch_size or FACE_BATCH_SIZE
+        embeddings = np.full((len(images), EMBEDDING_DIM), np.nan, dtype=np.float32)
+        failed = np.zeros(len(images), dtype=bool)
+        rec_model = self.face_app.models['recognition']
         
-        logger.info("✅ Face recognition system initialized successfully")
-        return True
-    except Exception as e:
-        logger.error(f"❌ Failed to initialize face recognition: {e}")
-        return False
+        rows, crops = [], []
+        for i, image_np in enumerate(images):
+            if image_np is None:
+                failed[i] = True
+                continue
+            try:
+                bboxes, kpss = self.face_app.det_model.detect(image_np, max_num=0, metric='default')
+                if bboxes.shape[0] == 0 or kpss is None:
+                    continue
+                # Same face as face_app.get(...)[0]: the highest-scoring detection
+                crops.append(face_align.norm_crop(image_np, landmark=kpss[0], image_size=rec_model.input_size[0]))
+                rows.append(i)
+            except Exception as e:
+                failed[i] = True
+                logger.error(f"Failed to detect faces: {e}")
+        
+        for start in range(0, len(crops), batch_size):
+            try:
+                feats = rec_model.get_feat(crops[start:start + batch_size])
+            except Exception as e:
+                logger.error(f"Failed to extract embeddings for a batch of {len(crops[start:start + batch_size])}: {e}")
+                failed[rows[start:start + batch_size]] = True
+                continue
+            feats = np.asarray(feats, dtype=np.float32)
+            embeddings[rows[start:start + batch_size]] = feats / np.linalg.norm(feats, axis=1, keepdims=True)
+        if return_failed:
+            return embeddings, failed
+        return embeddings
+
+    def query_from_image(self, image_np, source=None):
+        """Per-request query context for an image array, or None if no face is found"""
+        embedding = self.extract_embedding(image_np)
+        if embedding is None:
+            logger.warning(f"No face detected in query image {source or ''}")
+            return None
+        return QueryEmbedding(embedding, source=source)
+
+    def query_from_source(self, source):
+        """Per-request query context for bytes, a local path or an uploaded file"""
+        img_np = load_image(source)
+        if img_np is None:
+            return None
+        return self.query_from_image(img_np, source=source_label(source))
+
+    def query_from_path(self, image_path):
+        """Per-request query context for a local image file"""
+        return self.query_from_source(image_path)
+
+_service = None
+_service_lock = threading.Lock()
+
+def get_face_service():
+    """The process-wide FaceService, created on first use"""
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = FaceService()
+    return _service
+
+def initialize_face_recognition():
+    """Initialize the face recognition system (blocking; safe to call from several threads)"""
+    return get_face_service().initialize()
+
+def start_background_warmup():
+    """Load the models on a daemon thread; returns immediately"""
+    get_face_service().start_background_warmup()
+
+def ensure_initialized(timeout=None):
+    """Wait up to timeout seconds for the models, starting the load if nobody has yet"""
+    return get_face_service().ensure_initialized(timeout)
+
+def get_initialization_state():
+    """One of 'idle', 'loading', 'ready' or 'failed'"""
+    return get_face_service().state
 
 # -------------------------------
 # UTILITY FUNCTIONS
 # -------------------------------
+def open_image(fp, max_side=None):
+    """Open an image with PIL as an upright RGB array no larger than max_side on either side.
+
+    draft() lets the JPEG decoder scale by 1/2, 1/4 or 1/8 in the DCT domain,
+    so a 12 MP photo is never fully decoded; the EXIF orientation is applied
+    before the final resize.
+    """
+    max_side = max_side or DETECTION_MAX_SIDE
+    img = Image.open(fp)
+    img.draft('RGB', (max_side, max_side))
+    img = ImageOps.exif_transpose(img).convert("RGB")
+    img.thumbnail((max_side, max_side), Image.BILINEAR)
+    return np.array(img)
+
+# OpenCV decode flags by downscale factor (JPEG is scaled in the DCT domain)
+_REDUCED_DECODE_FLAGS = (
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
+)
+
+def _decode_flag(data, max_side):
+    """Largest reduced-decode flag that still leaves at least max_side pixels"""
+    try:
+        # PIL only parses the header here; the pixels are decoded by OpenCV
+        width, height = Image.open(BytesIO(data)).size
+    except Exception:
+        return cv2.IMREAD_COLOR
+    for factor, flag in _REDUCED_DECODE_FLAGS:
+        if max(width, height) // factor >= max_side:
+            return flag
+    return cv2.IMREAD_COLOR
+
+def decode_image_bytes(data, max_side=None):
+    """Decode an image buffer into an upright RGB array no larger than max_side.
+
+    The buffer is wrapped with np.frombuffer (no copy) and decoded straight
+    from memory by cv2.imdecode; formats OpenCV can't read fall back to PIL.
+    """
+    max_side = max_side or DETECTION_MAX_SIDE
+    img = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), _decode_flag(data, max_side))
+    if img is None:
+        return open_image(BytesIO(data), max_side)
+    
+    img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+    height, width = img.shape[:2]
+    if max(height, width) > max_side:
+        scale = max_side / max(height, width)
+        size = (max(1, round(width * scale)), max(1, round(height * scale)))
+        img = cv2.resize(img, size, interpolation=cv2.INTER_AREA)
+    return img
+
+def read_image_source(source):
+    """Raw bytes of an image given as bytes, a local path or a file-like object (e.g. an upload)"""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return source
+    if isinstance(source, (str, os.PathLike)):
+        if not os.path.exists(source):
+            raise FileNotFoundError(f"Image not found: {source}")
+        with open(source, 'rb') as f:
+            return f.read()
+    if hasattr(source, 'seek'):
+        source.seek(0)
+    return source.read()
+
+def source_label(source):
+    """Short name of an image source for logs: the path or file name, never the image bytes"""
+    if isinstance(source, (str, os.PathLike)):
+        return os.fspath(source)
+    name = getattr(source, 'name', None)
+    return str(name) if name else '<upload>'
+
+def load_image(source, max_side=None):
+    """Load bytes, a local path or an uploaded file into an RGB array; None on failure"""
+    try:
+        return decode_image_bytes(read_image_source(source), max_side)
+    except Exception as e:
+        logger.error(f"Failed to load image {source_label(source)}: {e}")
+        return None
+
 def load_image_from_url(image_url):
     """Load image from URL"""
     try:
-        response = requests.get(image_url, timeout=10)
+        response = http_get(image_url, timeout=10)
         response.raise_for_status()
-        img = Image.open(BytesIO(response.content)).convert("RGB")
-        return np.array(img)
+        return decode_image_bytes(response.content)
     except Exception as e:
         logger.error(f"Failed to load image from URL {image_url}: {e}")
         return None
 
 def load_image_from_path(image_path):
     """Load image from local path"""
-    try:
-        if not os.path.exists(image_path):
-            raise FileNotFoundError(f"Image not found: {image_path}")
-        img = Image.open(image_path).convert("RGB")
-        return np.array(img)
-    except Exception as e:
-        logger.error(f"Failed to load image from path {image_path}: {e}")
-        return None
+    return load_image(image_path)
 
 def extract_embedding(image_np):
     """Extract face embedding from image"""
-    try:
-        faces = face_app.get(image_np)
-        if not faces:
-            return None
-        return faces[0]["embedding"]
-    except Exception as e:
-        logger.error(f"Failed to extract embedding: {e}")
-        return None
+    return get_face_service().extract_embedding(image_np)
 
 def normalize_embedding(embedding):
     """Normalize embedding for cosine similarity"""
     return embedding / np.linalg.norm(embedding)
 
+# -------------------------------
+# CACHED EMBEDDINGS
+# -------------------------------
+def get_embedding_from_url(image_url):
+    """Normalized embedding for a remote image, or None if it has no face or cannot be loaded.
+
+    Goes through the persistent embedding cache: a fresh entry skips both the
+    HTTP fetch and the CNN, and a stale one is revalidated with If-None-Match or
+    by comparing the content hash before re-embedding.
+    """
+    if not is_initialized():
+        # Never cache a "no face" result just because the model isn't loaded yet
+        logger.warning(f"Face recognition not ready, skipping {image_url}")
+        return None
+    
+    embedding, pending = _resolve_url_embedding(image_url)
+    if pending is None:
+        return embedding
+    embeddings, failed = embed_images([pending[0]], return_failed=True)
+    return _store_url_embedding(image_url, pending, embeddings[0], failed[0])
+
+def _resolve_url_embedding(image_url):
+    """(embedding, None) when the cache settles image_url, else (None, (image_np, etag, digest)) to embed"""
+    cache = get_embedding_cache()
+    entry = cache.get(image_url, MODEL_NAME) if cache else None
+    if entry is not None and entry.is_fresh(cache.ttl):
+        cache.touch(image_url, MODEL_NAME)
+        return entry.embedding, None
+
+    try:
+        headers = {}
+        if entry is not None and entry.etag:
+            headers['If-None-Match'] = entry.etag
+        response = http_get(image_url, headers=headers, timeout=10)
+        if response.status_code == 304 and entry is not None:
+            cache.touch(image_url, MODEL_NAME, revalidated=True)
+            return entry.embedding, None
+        response.raise_for_status()
+    except Exception as e:
+        logger.error(f"Failed to load image from URL {image_url}: {e}")
+        return None, None
+
+    digest = content_hash(response.content)
+    etag = response.headers.get('ETag')
+    if entry is not None and entry.content_hash == digest:
+        cache.put(image_url, MODEL_NAME, etag, digest, entry.embedding)
+        return entry.embedding, None
+
+    try:
+        image_np = decode_image_bytes(response.content)
+    except Exception as e:
+        logger.error(f"Failed to decode image from URL {image_url}: {e}")
+        return None, None
+    return None, (image_np, etag, digest)
+
+def _store_url_embedding(image_url, pending, embedding, failed=False):
+    """Cache a freshly computed embedding row (NaN = no face) and return it, or None.
+
+    A row that failed (see FaceService.embed_batch) is not cached: only a
+    detector that ran and found nothing may be remembered as "no face".
+    """
+    if failed:
+        return None
+    _, etag, digest = pending
+    if embedding is not None and np.isnan(embedding).any():
+        embedding = None
+    cache = get_embedding_cache()
+    if cache:
+        cache.put(image_url, MODEL_NAME, etag, digest, embedding)
+    return embedding
+
+def get_embedding_from_path(image_path):
+    """Normalized embedding for a local image, or None if it has no face"""
+    img_np = load_image_from_path(image_path)
+    if img_np is None:
+        return None
+    embedding = extract_embedding(img_np)
+    if embedding is None:
+        return None
+    return normalize_embedding(np.asarray(embedding, dtype=np.float32))
+
+# -------------------------------
+# QUERY EMBEDDING
+# -------------------------------
+class QueryEmbedding:
+    """Normalized embedding of a search photo, computed once and compared against many profiles.
+
+    Each search owns its query; nothing here is shared with other requests.
+    """
+
+    def __init__(self, embedding, source=None):
+        self.embedding = normalize_embedding(np.asarray(embedding, dtype=np.float32))
+        self.source = source
+
+    @classmethod
+    def from_image(cls, image_np, source=None):
+        """Build a query from an image array, or return None if no face is found"""
+        return get_face_service().query_from_image(image_np, source=source)
+
+    @classmethod
+    def from_path(cls, image_path):
+        """Build a query from a local image file"""
+        return get_face_service().query_from_path(image_path)
+
+    @classmethod
+    def from_source(cls, source):
+        """Build a query from bytes, a local path or an uploaded file, without touching disk"""
+        return get_face_service().query_from_source(source)
+
+    def similarity(self, embedding):
+        """Cosine similarity between the query and another (unnormalized) embedding"""
+        return float(np.dot(self.embedding, normalize_embedding(embedding)))
+
+    def match_image(self, image_np):
+        """Cosine similarity against the first face in image_np, or None if there is no face"""
+        embedding = extract_embedding(image_np)
+        if embedding is None:
+            return None
+        return self.similarity(embedding)
+
+# -------------------------------
+# BATCH SCORING
+# -------------------------------
+def embed_images(images, batch_size=None, return_failed=False):
+    """Embed a list of image arrays into an (N, EMBEDDING_DIM) matrix.
+
+    Rows are L2-normalized; images that are None or contain no face get a NaN row
+    so positions always line up with the input list. Recognition runs in
+    batches of batch_size (FACE_BATCH_SIZE by default). return_failed also
+    returns the mask of rows that failed (see FaceService.embed_batch).
+    """
+    return get_face_service().embed_batch(images, batch_size=batch_size, return_failed=return_failed)
+
+def similarities_from_embeddings(embeddings, query_embedding):
+    """Cosine similarity of every normalized embedding row against the query in one matmul"""
+    if isinstance(query_embedding, QueryEmbedding):
+        query = query_embedding.embedding
+    else:
+        query = normalize_embedding(np.asarray(query_embedding, dtype=np.float32))
+    embeddings = np.asarray(embeddings, dtype=np.float32).reshape(-1, EMBEDDING_DIM)
+    return embeddings @ query
+
+def embed_image_sources(sources):
+    """Embed a list of image URLs or local paths (None allowed) into an (N, EMBEDDING_DIM) matrix.
+
+    Remote images go through the embedding cache; rows without a face are NaN.
+    Everything the cache cannot answer is embedded together in one batch.
+    """
+    embeddings = np.full((len(sources), EMBEDDING_DIM), np.nan, dtype=np.float32)
+    if not is_initialized():
+        logger.warning(f"Face recognition not ready, skipping {len(sources)} images")
+        return embeddings
+    
+    rows, images, pending_urls = [], [], []
+    for i, source in enumerate(sources):
+        if not source:
+            continue
+        if source.startswith('http'):
+            embedding, pending = _resolve_url_embedding(source)
+            if pending is None:
+                if embedding is not None:
+                    embeddings[i] = embedding
+                continue
+            image_np = pending[0]
+        else:
+            image_np, pending = load_image_from_path(source), None
+            if image_np is None:
+                continue
+        rows.append(i)
+        images.append(image_np)
+        pending_urls.append((source, pending))
+    
+    if images:
+        fresh, failed = embed_images(images, return_failed=True)
+        embeddings[rows] = fresh
+        for (source, pending), embedding, row_failed in zip(pending_urls, fresh, failed):
+            if pending is not None:
+                _store_url_embedding(source, pending, embedding, row_failed)
+    return embeddings
+
+def batch_similarities(images, query_embedding):
+    """Similarities of N images against one query embedding (NaN where no face was found).
+
+    Unlike register_face_*/match_face_*, this never touches the global FAISS index.
+    """
+    return similarities_from_embeddings(embed_images(images), query_embedding)
+
+# -------------------------------
+# INDEX BACKENDS
+# -------------------------------
+INDEX_TYPES = ('flat', 'hnsw', 'ivfpq')
+
+# k-means wants ~39 training points per centroid, for the IVF cells and for
+# each PQ sub-quantizer's 2**8 codewords alike
+IVF_POINTS_PER_CENTROID = 39
+PQ_CODEWORDS = 256
+
+def ivf_nlist_for(count):
+    """Number of IVF cells for count vectors: FACE_IVF_NLIST, or about 4*sqrt(count)"""
+    return IVF_NLIST or max(1, int(4 * np.sqrt(max(count, 1))))
+
+def ivfpq_min_faces(count):
+    """Faces needed to train IVF-PQ for count faces: 39 per IVF cell, and per PQ codeword.
+
+    With the derived nlist that is first reached at about 24k faces
+    (39 * 4*sqrt(N) <= N); with FACE_IVF_NLIST set, at 39 * max(nlist, 256).
+    """
+    return IVF_POINTS_PER_CENTROID * max(ivf_nlist_for(count), PQ_CODEWORDS)
+
+def build_index(index_type='flat', embeddings=None, fill=True):
+    """Create an inner-product index of the given type, trained and filled with embeddings.
+
+    IVF-PQ needs training data: with fewer than ivfpq_min_faces() embeddings
+    (~24k with the default nlist) recall collapses, so it falls back to a
+    flat index. With fill=False the embeddings
+    are only used for training, so the caller can add them with its own ids.
+    """
+    if embeddings is None:
+        embeddings = np.empty((0, EMBEDDING_DIM), dtype=np.float32)
+    embeddings = np.ascontiguousarray(embeddings, dtype=np.float32).reshape(-1, EMBEDDING_DIM)
+    
+    if index_type == 'ivfpq' and len(embeddings) < ivfpq_min_faces(len(embeddings)):
+        logger.warning(f"IVF-PQ needs at least {ivfpq_min_faces(len(embeddings))} faces to train, "
+                       f"got {len(embeddings)}; using flat")
+        index_type = 'flat'
+    
+    if index_type == 'flat':
+        index = faiss.IndexFlatIP(EMBEDDING_DIM)
+    elif index_type == 'hnsw':
+        index = faiss.IndexHNSWFlat(EMBEDDING_DIM, HNSW_M, faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+    elif index_type == 'ivfpq':
+        quantizer = faiss.IndexFlatIP(EMBEDDING_DIM)
+        index = faiss.IndexIVFPQ(quantizer, EMBEDDING_DIM, ivf_nlist_for(len(embeddings)), IVF_PQ_M, 8,
+                                 faiss.METRIC_INNER_PRODUCT)
+        index.train(embeddings)
+    else:
+        raise ValueError(f"Unknown face index type '{index_type}', expected one of {INDEX_TYPES}")
+    
+    configure_index(index)
+    if fill and len(embeddings):
+        index.add(embeddings)
+    return index
+
+def configure_index(index, nprobe=None, ef_search=None):
+    """Apply query-time recall/latency knobs (nprobe for IVF, efSearch for HNSW)"""
+    inner = faiss.downcast_index(index)
+    if isinstance(inner, faiss.IndexIDMap):
+        inner = faiss.downcast_index(inner.index)
+    kind = index_type_of(inner)
+    if kind == 'ivfpq':
+        faiss.extract_index_ivf(inner).nprobe = nprobe or IVF_NPROBE
+    elif kind == 'hnsw':
+        inner.hnsw.efSearch = ef_search or HNSW_EF_SEARCH
+    return index
+
+def index_type_of(index):
+    """Backend name of an index ('flat', 'hnsw' or 'ivfpq')"""
+    index = faiss.downcast_index(index)
+    if isinstance(index, faiss.IndexIDMap):
+        index = faiss.downcast_index(index.index)
+    if isinstance(index, faiss.IndexHNSW):
+        return 'hnsw'
+    if isinstance(index, faiss.IndexIVF):
+        return 'ivfpq'
+    return 'flat'
+
+def search_params(index, exclude):
+    """SearchParameters that skip the ids in exclude, keeping the index's nprobe / efSearch"""
+    batch = faiss.IDSelectorBatch(np.asarray(sorted(exclude), dtype=np.int64))
+    selector = faiss.IDSelectorNot(batch)
+    inner = faiss.downcast_index(index)
+    if isinstance(inner, faiss.IndexIDMap):
+        inner = faiss.downcast_index(inner.index)
+    kind = index_type_of(inner)
+    if kind == 'hnsw':
+        params = faiss.SearchParametersHNSW(sel=selector, efSearch=inner.hnsw.efSearch)
+    elif kind == 'ivfpq':
+        params = faiss.SearchParametersIVF(sel=selector, nprobe=faiss.extract_index_ivf(inner).nprobe)
+    else:
+        params = faiss.SearchParameters(sel=selector)
+    # The selectors are C++ objects referenced by pointer; keep them alive with the params
+    params.selectors = (batch, selector)
+    return params
+
+def index_vectors(index):
+    """All vectors stored in an index (approximate for IVF-PQ)"""
+    if index.ntotal == 0:
+        return np.empty((0, EMBEDDING_DIM), dtype=np.float32)
+    if index_type_of(index) == 'ivfpq':
+        faiss.extract_index_ivf(index).make_direct_map()
+    return index.reconstruct_n(0, index.ntotal)
+
+def target_index_type(count):
+    """Which backend the gallery should use for count faces"""
+    if GALLERY_INDEX_TYPE == 'auto':
+        return 'hnsw' if count >= GALLERY_AUTO_THRESHOLD else 'flat'
+    return GALLERY_INDEX_TYPE
+
+# -------------------------------
+# ID-MAPPED FACE STORE
+# -------------------------------
+def with_ids(index):
+    """Make an index addressable by our own int64 ids.
+
+    Flat and HNSW indexes get an IndexIDMap2 wrapper; IVF indexes store ids
+    natively (IDMap's compaction doesn't match how IVF removes vectors) and
+    get a hashtable direct map so faces can be reconstructed by id.
+    """
+    if index_type_of(index) == 'ivfpq':
+        faiss.extract_index_ivf(index).set_direct_map_type(faiss.DirectMap.Hashtable)
+        return index
+    return faiss.IndexIDMap2(index)
+
+class FaceStore:
+    """Normalized embeddings in a FAISS index keyed by int64 ids, plus an id -> metadata table.
+
+    Faces are addressed by stable ids, so one can be removed or replaced
+    without rebuilding the rest. Flat and IVF indexes delete in place; HNSW
+    cannot, so its removed ids become tombstones (deleted) that searches
+    skip until compact() drops them. An optional key (e.g. a profile) keeps
+    at most one face per key. When max_faces is set, the oldest ids are
+    evicted so memory stays bounded.
+    """
+
+    def __init__(self, index_type='flat', max_faces=0):
+        self.index = with_ids(build_index(index_type))
+        self.metadata = {}    # id -> metadata dict
+        self.keys = {}        # key -> id
+        self.deleted = set()  # ids still in the index but removed from the store
+        self.model = None     # model pack the embeddings come from
+        self.next_id = 0
+        self.max_faces = max_faces
+        self._search_params = None
+
+    def __len__(self):
+        return len(self.metadata)
+
+    @property
+    def index_type(self):
+        return index_type_of(self.index)
+
+    def get(self, key):
+        face_id = self.keys.get(key)
+        return None if face_id is None else self.metadata.get(face_id)
+
+    def add(self, embedding, metadata, key=None, replace=False):
+        """Store a face and return its id; an existing key is kept unless replace=True"""
+        if key is not None and key in self.keys:
+            if not replace:
+                return None
+            self.remove(key)
+        
+        face_id = self.next_id
+        # The index is written first: if FAISS fails, the table is left untouched
+        self.index.add_with_ids(
+            np.asarray([embedding], dtype=np.float32).reshape(1, EMBEDDING_DIM),
+            np.array([face_id], dtype=np.int64)
+        )
+        self.next_id += 1
+        metadata = dict(metadata)
+        if key is not None:
+            metadata['key'] = key
+            self.keys[key] = face_id
+        self.metadata[face_id] = metadata
+        self._evict_over_limit()
+        return face_id
+
+    def remove(self, key):
+        """Remove the face stored under key; returns True if there was one"""
+        face_id = self.keys.get(key)
+        if face_id is None:
+            return False
+        self.remove_ids([face_id])
+        return True
+
+    def remove_ids(self, face_ids):
+        face_ids = [face_id for face_id in face_ids if face_id in self.metadata]
+        if not face_ids:
+            return 0
+        self._drop_from_index(face_ids)
+        for face_id in face_ids:
+            metadata = self.metadata.pop(face_id)
+            if self.keys.get(metadata.get('key')) == face_id:
+                del self.keys[metadata['key']]
+        return len(face_ids)
+
+    def _drop_from_index(self, face_ids):
+        try:
+            self.index.remove_ids(np.asarray(list(face_ids), dtype=np.int64))
+        except RuntimeError:
+            # HNSW graphs cannot delete in place; hide the ids until compaction
+            self.deleted.update(face_ids)
+            self._search_params = None
+
+    def needs_compaction(self):
+        return bool(self.deleted) and len(self.deleted) > GALLERY_COMPACT_FRACTION * self.index.ntotal
+
+    def compact(self):
+        """Rebuild the index without its tombstones (blocking; see FaceGallery for the background version)"""
+        self.rebuild(self.index_type)
+
+    def replace_index(self, index, removed=()):
+        """Swap in an index rebuilt elsewhere; removed are ids it holds that the store no longer has"""
+        self.index = index
+        self.deleted = set()
+        self._search_params = None
+        if removed:
+            self._drop_from_index(removed)
+
+    def search(self, query, top_k=10, threshold=SIMILARITY_THRESHOLD):
+        """Return [(id, score, metadata)] for faces at or above threshold, best first"""
+        if not self.metadata:
+            return []
+        query = np.asarray(query, dtype=np.float32).reshape(1, EMBEDDING_DIM)
+        if self.deleted and self._search_params is None:
+            self._search_params = search_params(self.index, self.deleted)
+        params = self._search_params if self.deleted else None
+        scores, ids = self.index.search(query, min(top_k, len(self.metadata)), params=params)
+        matches = []
+        for face_id, score in zip(ids[0], scores[0]):
+            metadata = self.metadata.get(int(face_id))
+            if face_id >= 0 and metadata is not None and score >= threshold:
+                matches.append((int(face_id), float(score), metadata))
+        return matches
+
+    def vectors(self):
+        """(ids, vectors) for every stored face"""
+        ids = np.array(sorted(self.metadata), dtype=np.int64)
+        if not len(ids):
+            return ids, np.empty((0, EMBEDDING_DIM), dtype=np.float32)
+        return ids, self.index.reconstruct_batch(ids)
+
+    def rebuild(self, index_type, exclude=()):
+        """Re-create the index with another backend (or without some ids), keeping ids"""
+        ids, vectors = self.vectors()
+        if exclude:
+            keep = np.array([face_id not in exclude for face_id in ids.tolist()], dtype=bool)
+            ids, vectors = ids[keep], vectors[keep]
+        index = with_ids(build_index(index_type, vectors, fill=False))
+        if len(ids):
+            index.add_with_ids(np.ascontiguousarray(vectors, dtype=np.float32), ids)
+        self.replace_index(index)
+
+    def _evict_over_limit(self):
+        if not self.max_faces or len(self.metadata) <= self.max_faces:
+            return
+        # Evict a little extra so a full store doesn't evict on every add
+        excess = len(self.metadata) - self.max_faces + max(1, self.max_faces // 20)
+        oldest = sorted(self.metadata)[:excess]
+        self.remove_ids(oldest)
+        logger.info(f"🧹 Evicted {len(oldest)} oldest faces (limit {self.max_faces})")
+
+    def snapshot(self):
+        """In-memory copy of the store for write_snapshot(); metadata dicts are never mutated in place"""
+        return faiss.serialize_index(self.index), {
+            'model': self.model,
+            'next_id': self.next_id,
+            'faces': dict(self.metadata),
+            'deleted': sorted(self.deleted),
+        }
+
+    @staticmethod
+    def write_snapshot(snapshot, index_path, meta_path):
+        index_bytes, data = snapshot
+        with open(index_path + '.tmp', 'wb') as f:
+            f.write(index_bytes.tobytes())
+        with open(meta_path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump({
+                'model': data['model'],
+                'next_id': data['next_id'],
+                'faces': {str(face_id): metadata for face_id, metadata in data['faces'].items()},
+                'deleted': data['deleted'],
+            }, f)
+        os.replace(index_path + '.tmp', index_path)
+        os.replace(meta_path + '.tmp', meta_path)
+
+    def save(self, index_path, meta_path):
+        self.write_snapshot(self.snapshot(), index_path, meta_path)
+
+    @classmethod
+    def load(cls, index_path, meta_path, max_faces=0, model=None):
+        """Load a saved store; raises ValueError if it was saved with another model than model"""
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        saved_model = data.get('model') if isinstance(data, dict) else None
+        if model and saved_model and saved_model != model:
+            raise ValueError(f"it holds {saved_model} embeddings, not {model}")
+        index = faiss.read_index(index_path)
+        
+        store = cls(max_faces=max_faces)
+        store.model = model or saved_model
+        if isinstance(data, list):
+            # Older galleries: a plain index whose row i belongs to data[i]
+            ids = np.arange(len(data), dtype=np.int64)
+            vectors = index_vectors(index)
+            store.index = with_ids(build_index(index_type_of(index), vectors, fill=False))
+            if len(ids):
+                store.index.add_with_ids(vectors, ids)
+            store.metadata = {int(face_id): metadata for face_id, metadata in zip(ids.tolist(), data)}
+            store.next_id = len(data)
+        else:
+            store.index = configure_index(with_ids(index) if index_type_of(index) == 'ivfpq' else index)
+            store.metadata = {int(face_id): metadata for face_id, metadata in data['faces'].items()}
+            store.deleted = set(data.get('deleted', []))
+            store.next_id = data['next_id']
+        
+        if store.index.ntotal != len(store.metadata) + len(store.deleted):
+            raise ValueError(f"index has {store.index.ntotal} faces but metadata has {len(store.metadata)} "
+                             f"(+{len(store.deleted)} deleted)")
+        store.keys = {metadata['key']: face_id for face_id, metadata in store.metadata.items() if 'key' in metadata}
+        return store
+
+# -------------------------------
+# PERSISTENT FACE GALLERY
+# -------------------------------
+# Profile metadata kept alongside each gallery face
+GALLERY_PROFILE_FIELDS = (
+    'platform', 'username', 'full_name', 'bio', 'location', 'company', 'profile_url',
+    'image_url', 'followers_count', 'public_repos', 'email', 'website',
+)
+
+def gallery_key(profile):
+    platform = profile.get('platform') or ''
+    username = (profile.get('username') or '').strip().lower()
+    url = (profile.get('profile_url') or '').strip().lower()
+    return f"{platform}:{username or url}"
+
+class ReadWriteLock:
+    """Many concurrent readers or one writer; a waiting writer holds off new readers"""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._readers = 0
+        self._writer = False
+        self._writers_waiting = 0
+
+    @contextmanager
+    def read(self):
+        with self._cond:
+            while self._writer or self._writers_waiting:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write(self):
+        with self._cond:
+            self._writers_waiting += 1
+            while self._writer or self._readers:
+                self._cond.wait()
+            self._writers_waiting -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writer = False
+                self._cond.notify_all()
+
+class FaceGallery:
+    """A FaceStore shared between threads: searches run concurrently, changes are exclusive.
+
+    With a directory the store is loaded lazily from disk and written back by
+    save(), which batches changes (see GALLERY_SAVE_EVERY); with auto_switch
+    the index backend follows target_index_type() as the gallery grows.
+    """
+
+    def __init__(self, directory=None, max_faces=0, auto_switch=True, name='face gallery', model=None,
+                 legacy_directory=None):
+        self.directory = directory
+        # A gallery saved elsewhere by an older version, moved into directory on the next save
+        self.legacy_directory = legacy_directory
+        self.model = model
+        self.max_faces = max_faces
+        self.auto_switch = auto_switch
+        self.name = name
+        self.store = None
+        # Changes made since load, and how many of them are on disk
+        self.changes = 0
+        self.saved_changes = 0
+        self.saved_at = time.time()
+        self.lock = ReadWriteLock()
+        self._save_lock = threading.Lock()
+        self._rebuild_thread = None
+
+    @property
+    def dirty(self):
+        return self.changes != self.saved_changes
+
+    def paths(self):
+        return os.path.join(self.directory, GALLERY_INDEX_FILE), os.path.join(self.directory, GALLERY_META_FILE)
+
+    def load(self):
+        """Load the store from disk (or start an empty one)"""
+        with self.lock.write():
+            self._load()
+            return self.store
+
+    def _saved_paths(self):
+        """(index_path, meta_path) of the saved store, in directory or else legacy_directory, or None"""
+        for directory in (self.directory, self.legacy_directory):
+            if not directory:
+                continue
+            index_path = os.path.join(directory, GALLERY_INDEX_FILE)
+            meta_path = os.path.join(directory, GALLERY_META_FILE)
+            if os.path.exists(index_path) and os.path.exists(meta_path):
+                return index_path, meta_path
+        return None
+
+    def _load(self):
+        store = None
+        saved_paths = self._saved_paths()
+        if saved_paths:
+            try:
+                store = FaceStore.load(*saved_paths, max_faces=self.max_faces, model=self.model)
+            except Exception as e:
+                logger.error(f"❌ Could not load {self.name}, starting empty: {e}")
+        
+        initial_type = target_index_type(0) if self.auto_switch else 'flat'
+        self.store = store if store is not None else FaceStore(initial_type, max_faces=self.max_faces)
+        self.store.model = self.model
+        self.saved_changes = self.changes
+        self.saved_at = time.time()
+        if store is not None and os.path.dirname(saved_paths[0]) != self.directory:
+            # Loaded from the legacy location: the next save writes it to directory
+            self.changes += 1
+        if self.directory:
+            logger.info(f"📚 {self.name.capitalize()} loaded with {len(self.store)} faces ({self.store.index_type})")
+        if not self._maybe_switch_index():
+            self._maybe_compact()
+
+    def _ensure_loaded(self):
+        if self.store is None:
+            with self.lock.write():
+                if self.store is None:
+                    self._load()
+
+    def _maybe_switch_index(self):
+        """Start a background rebuild with another backend when the size or configuration calls for it.
+
+        Called with the write lock held; the current index keeps serving
+        searches and adds until the new one is swapped in (see _rebuild).
+        """
+        if not self.auto_switch:
+            return False
+        count = len(self.store)
+        target = target_index_type(count)
+        if self.store.index_type == target or (target == 'ivfpq' and count < ivfpq_min_faces(count)):
+            return False
+        return self._start_rebuild(target)
+
+    def _maybe_compact(self):
+        """Compact in the background once HNSW tombstones pile up (call with the write lock held)"""
+        if self.store.needs_compaction():
+            self._start_rebuild(self.store.index_type)
+
+    def _start_rebuild(self, index_type):
+        if self._rebuild_thread is not None and self._rebuild_thread.is_alive():
+            return False
+        self._rebuild_thread = threading.Thread(target=self._rebuild, args=(index_type,),
+                                                name='face-index-rebuild', daemon=True)
+        self._rebuild_thread.start()
+        return True
+
+    def _rebuild(self, index_type):
+        """Build a new index from a copy of the vectors without holding the lock, then swap it in.
+
+        Faces added or removed while it was building are applied to the new
+        index before the swap, so searches and adds only ever wait for the
+        copy and the catch-up.
+        """
+        try:
+            started = time.time()
+            with self.lock.read():
+                store = self.store
+                ids, vectors = store.vectors()
+            index = with_ids(build_index(index_type, vectors, fill=False))
+            if len(ids):
+                index.add_with_ids(np.ascontiguousarray(vectors, dtype=np.float32), ids)
+            
+            with self.lock.write():
+                if self.store is not store:
+                    return  # cleared or reloaded meanwhile
+                built = set(ids.tolist())
+                added = np.array(sorted(set(store.metadata) - built), dtype=np.int64)
+                if len(added):
+                    index.add_with_ids(store.index.reconstruct_batch(added), added)
+                store.replace_index(index, removed=built - set(store.metadata))
+                self.changes += 1
+            logger.info(f"🔁 Rebuilt {self.name} as {index_type_of(index)} "
+                        f"({len(ids)} faces, {time.time() - started:.1f}s)")
+        except Exception as e:
+            logger.error(f"❌ Failed to rebuild {self.name}: {e}")
+
+    def wait_for_rebuild(self, timeout=None):
+        """Block until a background rebuild (if any) has finished"""
+        thread = self._rebuild_thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def save(self, force=False):
+        """Write the store to disk if it changed and a save is due (always with force).
+
+        A save is due after GALLERY_SAVE_EVERY changes or GALLERY_SAVE_INTERVAL
+        seconds. The store is only copied under the lock (searches keep
+        running, adds wait for the copy); the files are written outside it
+        and replaced atomically.
+        """
+        if not self.directory:
+            return False
+        with self._save_lock:
+            # A read lock is enough: adds take the write lock, so the copy is consistent
+            with self.lock.read():
+                pending = self.changes - self.saved_changes
+                if self.store is None or not pending:
+                    return False
+                if not force and pending < GALLERY_SAVE_EVERY and time.time() - self.saved_at < GALLERY_SAVE_INTERVAL:
+                    return False
+                snapshot = self.store.snapshot()
+                changes, size = self.changes, len(self.store)
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                FaceStore.write_snapshot(snapshot, *self.paths())
+                self.saved_changes = changes
+                self.saved_at = time.time()
+                logger.info(f"💾 Saved {self.name} with {size} faces")
+                return True
+            except Exception as e:
+                logger.error(f"❌ Failed to save {self.name}: {e}")
+                return False
+
+    def add(self, embedding, metadata, key=None, replace=False):
+        """Store a face; replace may be a callable deciding from the existing entry's metadata.
+
+        Returns the new id, or None if the key was kept as is.
+        """
+        self._ensure_loaded()
+        with self.lock.write():
+            if key is not None and callable(replace):
+                existing = self.store.get(key)
+                replace = existing is None or replace(existing)
+            face_id = self.store.add(embedding, metadata, key=key, replace=replace)
+            if face_id is not None:
+                self.changes += 1
+                if not self._maybe_switch_index():
+                    self._maybe_compact()
+            return face_id
+
+    def remove(self, key):
+        self._ensure_loaded()
+        with self.lock.write():
+            removed = self.store.remove(key)
+            if removed:
+                self.changes += 1
+                self._maybe_compact()
+            return removed
+
+    def search(self, query, top_k=10, threshold=SIMILARITY_THRESHOLD):
+        """[(id, score, metadata)] best first; metadata is a copy the caller may modify"""
+        self._ensure_loaded()
+        with self.lock.read():
+            return [
+                (face_id, score, dict(metadata))
+                for face_id, score, metadata in self.store.search(query, top_k=top_k, threshold=threshold)
+            ]
+
+    def clear(self):
+        with self.lock.write():
+            self.store = FaceStore(max_faces=self.max_faces)
+            self.store.model = self.model
+            self.changes += 1
+
+    def __len__(self):
+        self._ensure_loaded()
+        with self.lock.read():
+            return len(self.store)
+
+def load_gallery():
+    """Load the gallery from disk (or start an empty one); called lazily on first use"""
+    return get_face_service().gallery.load()
+
+def save_gallery(force=False):
+    """Write the gallery to disk if it changed and a save is due (see FaceGallery.save)"""
+    return get_face_service().gallery.save(force=force)
+
+def add_to_gallery(embedding, profile):
+    """Remember a profile's face.
+    
+    A profile already in the gallery is skipped unless its avatar URL changed,
+    in which case the stale face is replaced in place.
+    """
+    metadata = {field: profile.get(field) for field in GALLERY_PROFILE_FIELDS}
+    metadata['seen_at'] = time.time()
+    face_id = get_face_service().gallery.add(
+        embedding, metadata, key=gallery_key(profile),
+        replace=lambda existing: existing.get('image_url') != profile.get('image_url'),
+    )
+    return face_id is not None
+
+def remove_from_gallery(profile):
+    """Forget a profile's face (e.g. a deleted account)"""
+    return get_face_service().gallery.remove(gallery_key(profile))
+
+def search_gallery(query_embedding, top_k=10, threshold=SIMILARITY_THRESHOLD):
+    """Previously seen profiles whose face matches the query, best first"""
+    if isinstance(query_embedding, QueryEmbedding):
+        query = query_embedding.embedding
+    else:
+        query = normalize_embedding(np.asarray(query_embedding, dtype=np.float32))
+    
+    return [
+        {'score': score, 'profile': metadata}
+        for _, score, metadata in get_face_service().gallery.search(query, top_k=top_k, threshold=threshold)
+    ]
+
+def get_gallery_size():
+    return len(get_face_service().gallery)
+
 # -------------------------------
 # FACE REGISTRATION AND MATCHING
 # -------------------------------
+def _register_embedding(embedding, face_id, source):
+    # Re-registering a face_id replaces its previous embedding
+    get_face_service().registered.add(embedding, {'face_id': face_id}, key=face_id, replace=True)
+    logger.info(f"✅ Registered '{face_id}' from {source}")
+    return True
+
+def _match_embedding(embedding, top_k):
+    matches = []
+    registered = get_face_service().registered
+    for _, score, metadata in registered.search(embedding, top_k=top_k, threshold=SIMILARITY_THRESHOLD):
+        matches.append({
+            'id': metadata['face_id'],
+            'confidence': score * 100,  # Convert to percentage
+            'score': score
+        })
+    return matches
+
+
 def register_face_from_url(image_url, face_id):
     """Register a face from URL"""
     try:
-        img_np = load_image_from_url(image_url)
-        if img_np is None:
-            return False
-            
-        embedding = extract_embedding(img_np)
+        embedding = get_embedding_from_url(image_url)
         if embedding is None:
             logger.warning(f"No face detected in {image_url}")
             return False
-            
-        # Normalize embedding
-        embedding = normalize_embedding(embedding)
         
-        # Add to FAISS index
-        faiss_index.add(np.array([embedding]))
-        id_map.append(face_id)
-        
-        logger.info(f"✅ Registered '{face_id}' from {image_url}")
-        return True
+        return _register_embedding(embedding, face_id, image_url)
     except Exception as e:
         logger.error(f"❌ Registration failed for '{face_id}': {e}")
         return False
@@ -115,28 +1233,20 @@ def register_face_from_url(image_url, face_id):
 def register_face_from_path(image_path, face_id):
     """Register a face from local path"""
     try:
-        img_np = load_image_from_path(image_path)
-        if img_np is None:
-            return False
-            
-        embedding = extract_embedding(img_np)
+        embedding = get_embedding_from_path(image_path)
         if embedding is None:
             logger.warning(f"No face detected in {image_path}")
             return False
-            
-        # Normalize embedding
-        embedding = normalize_embedding(embedding)
-        
-        # Add to FAISS index
-        faiss_index.add(np.array([embedding]))
-        id_map.append(face_id)
         
-        logger.info(f"✅ Registered '{face_id}' from {image_path}")
-        return True
+        return _register_embedding(embedding, face_id, image_path)
     except Exception as e:
         logger.error(f"❌ Registration failed for '{face_id}': {e}")
         return False
 
+def unregister_face(face_id):
+    """Remove a registered face; returns True if it existed"""
+    return get_face_service().registered.remove(face_id)
+
 def match_face_from_url(image_url, top_k=5):
     """Match a face from URL against registered faces"""
     try:
@@ -148,24 +1258,8 @@ def match_face_from_url(image_url, top_k=5):
         if embedding is None:
             logger.warning(f"No face detected in {image_url}")
             return []
-            
-        # Normalize embedding
-        embedding = normalize_embedding(embedding)
-        
-        # Search in FAISS index
-        query_embedding = np.array([embedding])
-        scores, indices = faiss_index.search(query_embedding, k=min(top_k, len(id_map)))
-        
-        matches = []
-        for i, (idx, score) in enumerate(zip(indices[0], scores[0])):
-            if idx < len(id_map) and score >= SIMILARITY_THRESHOLD:
-                confidence = score * 100  # Convert to percentage
-                matches.append({
-                    'id': id_map[idx],
-                    'confidence': confidence,
-                    'score': score
-                })
         
+        matches = _match_embedding(normalize_embedding(embedding), top_k)
         logger.info(f"🔍 Found {len(matches)} matches for {image_url}")
         return matches
         
@@ -176,32 +1270,12 @@ def match_face_from_url(image_url, top_k=5):
 def match_face_from_path(image_path, top_k=5):
     """Match a face from local path against registered faces"""
     try:
-        img_np = load_image_from_path(image_path)
-        if img_np is None:
-            return []
-            
-        embedding = extract_embedding(img_np)
+        embedding = get_embedding_from_path(image_path)
         if embedding is None:
             logger.warning(f"No face detected in {image_path}")
             return []
-            
-        # Normalize embedding
-        embedding = normalize_embedding(embedding)
-        
-        # Search in FAISS index
-        query_embedding = np.array([embedding])
-        scores, indices = faiss_index.search(query_embedding, k=min(top_k, len(id_map)))
-        
-        matches = []
-        for i, (idx, score) in enumerate(zip(indices[0], scores[0])):
-            if idx < len(id_map) and score >= SIMILARITY_THRESHOLD:
-                confidence = score * 100  # Convert to percentage
-                matches.append({
-                    'id': id_map[idx],
-                    'confidence': confidence,
-                    'score': score
-                })
         
+        matches = _match_embedding(embedding, top_k)
         logger.info(f"🔍 Found {len(matches)} matches for {image_path}")
         return matches
         
@@ -218,22 +1292,16 @@ def get_best_match_score(image_url):
 
 def clear_registered_faces():
     """Clear all registered faces"""
-    global faiss_index, id_map
-    faiss_index = faiss.IndexFlatIP(EMBEDDING_DIM)
-    id_map = []
+    get_face_service().registered.clear()
     logger.info("🧹 Cleared all registered faces")
 
 def get_registered_faces_count():
     """Get the number of registered faces"""
-    return len(id_map)
+    return len(get_face_service().registered)
 
 # -------------------------------
 # INITIALIZATION CHECK
 # -------------------------------
 def is_initialized():
     """Check if face recognition is initialized"""
-    return face_app is not None and faiss_index is not None
-
-# Initialize the system when module is imported
-if not is_initialized():
-    initialize_face_recognition() 
\ No newline at end of file
+    return get_face_service().is_initialized()
@@ -0,0 +1,152 @@
+import os
+import time
+import threading
+from contextlib import contextmanager
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# -------------------------------
+# CONFIGURATION
+# -------------------------------
+HTTP_POOL_SIZE = int(os.environ.get("HTTP_POOL_SIZE", "10"))  # keep-alive connections per host
+HTTP_MAX_RETRIES = int(os.environ.get("HTTP_MAX_RETRIES", "2"))
+HTTP_BACKOFF_FACTOR = float(os.environ.get("HTTP_BACKOFF_FACTOR", "0.5"))
+HTTP_RETRY_STATUSES = (500, 502, 503, 504)
+# Per-host request limits, "host=concurrency/interval,..." (e.g. "api.github.com=2/0.5"):
+# requests in flight at once and minimum seconds between request starts. A host
+# also covers its subdomains; hosts without a limit are not throttled.
+HTTP_RATE_LIMITS = os.environ.get("HTTP_RATE_LIMITS", "")
+
+# One session per host so every worker thread reuses the same TCP/TLS connections
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def build_session(pool_size=HTTP_POOL_SIZE, max_retries=HTTP_MAX_RETRIES, backoff_factor=HTTP_BACKOFF_FACTOR):
+    """Create a requests.Session with a keep-alive connection pool and retry/backoff"""
+    retry = Retry(
+        total=max_retries,
+        connect=max_retries,
+        read=max_retries,
+        status=max_retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=HTTP_RETRY_STATUSES,
+        allowed_methods=frozenset(['GET', 'HEAD']),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def get_session(url):
+    """Return the shared session for the host of url, creating it on first use"""
+    host = urlparse(url).netloc.lower()
+    session = _sessions.get(host)
+    if session is None:
+        with _sessions_lock:
+            session = _sessions.get(host)
+            if session is None:
+                session = build_session()
+                _sessions[host] = session
+    return session
+
+
+def parse_rate_limits(value):
+    """'api.github.com=2/0.5,serpapi.com=1' -> {'api.github.com': (2, 0.5), 'serpapi.com': (1, 0.0)}"""
+    limits = {}
+    for item in (value or '').split(','):
+        if '=' not in item:
+            continue
+        host, limit = item.split('=', 1)
+        concurrency, _, interval = limit.partition('/')
+        limits[host.strip().lower()] = (max(1, int(concurrency)), float(interval or 0))
+    return limits
+
+
+class RateLimiter:
+    """Caps concurrent requests and request rate per host, shared by every thread.
+
+    A request first takes one of its host's slots, then waits until at
+    least the host's interval has passed since the previous request started.
+    """
+
+    def __init__(self, limits):
+        self.limits = dict(limits)
+        self._semaphores = {host: threading.BoundedSemaphore(concurrency)
+                            for host, (concurrency, _) in self.limits.items()}
+        self._next_start = {}
+        self._lock = threading.Lock()
+        self.requests = {}
+        self.waited = {}
+
+    def limit_key(self, url):
+        """The configured host that url falls under, or None"""
+        host = (urlparse(url).hostname or '').lower()
+        while host:
+            if host in self.limits:
+                return host
+            host = host.partition('.')[2]
+        return None
+
+    def _reserve_start(self, key):
+        """Seconds this request has to wait for its turn"""
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start.get(key, now))
+            self._next_start[key] = start + self.limits[key][1]
+            self.requests[key] = self.requests.get(key, 0) + 1
+            self.waited[key] = self.waited.get(key, 0) + (start - now)
+        return start - now
+
+    @contextmanager
+    def slot(self, url):
+        key = self.limit_key(url)
+        if key is None:
+            yield
+            return
+        with self._semaphores[key]:
+            delay = self._reserve_start(key)
+            if delay > 0:
+                time.sleep(delay)
+            yield
+
+
+_rate_limiter = RateLimiter(parse_rate_limits(HTTP_RATE_LIMITS)) if HTTP_RATE_LIMITS else None
+
+
+def install_rate_limiter(limiter):
+    """Make limiter (a RateLimiter, or None for no limits) process-wide; returns the previous one"""
+    global _rate_limiter
+    previous, _rate_limiter = _rate_limiter, limiter
+    return previous
+
+
+@contextmanager
+def request_slot(url):
+    """Hold url's host slot for the duration of a request made outside http_get (e.g. by an SDK)"""
+    limiter = _rate_limiter
+    if limiter is None:
+        yield
+        return
+    with limiter.slot(url):
+        yield
+
+
+def http_get(url, **kwargs):
+    """Drop-in replacement for requests.get that goes through the pooled per-host session"""
+    with request_slot(url):
+        return get_session(url).get(url, **kwargs)
+
+
+def close_sessions():
+    """Close every pooled session (e.g. on worker shutdown)"""
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
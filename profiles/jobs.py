@@ -0,0 +1,107 @@
+import datetime
+import traceback
+from django.utils import timezone
+from .models import SearchJob, SearchQuery
+
+# Jobs stuck in "running" longer than this are assumed to belong to a dead worker
+STALE_JOB_MINUTES = 15
+
+
+def serialize_search_data(search_data):
+    """JSON-safe copy of the form's cleaned_data (the photo is stored on the job itself)"""
+    data = {}
+    for key, value in search_data.items():
+        if key == 'profile_photo':
+            continue
+        if isinstance(value, (datetime.date, datetime.datetime)):
+            value = value.isoformat()
+        data[key] = value
+    return data
+
+
+def enqueue_search(search_data):
+    """Create a pending SearchJob for the worker and return it immediately"""
+    return SearchJob.objects.create(
+        search_data=serialize_search_data(search_data),
+        profile_photo=search_data.get('profile_photo') or None,
+    )
+
+
+def claim_next_job():
+    """Atomically move the oldest pending job to running and return it, or None.
+
+    The conditional UPDATE makes claiming safe with several workers on any
+    database backend, including SQLite (which has no SELECT ... FOR UPDATE).
+    """
+    pending = SearchJob.objects.filter(status=SearchJob.STATUS_PENDING).order_by('created_at')
+    for job_id in pending.values_list('id', flat=True)[:10]:
+        claimed = SearchJob.objects.filter(pk=job_id, status=SearchJob.STATUS_PENDING).update(
+            status=SearchJob.STATUS_RUNNING,
+            started_at=timezone.now(),
+        )
+        if claimed:
+            return SearchJob.objects.get(pk=job_id)
+    return None
+
+
+def requeue_stale_jobs(max_age_minutes=STALE_JOB_MINUTES):
+    """Put jobs abandoned by a crashed worker back in the queue; returns how many"""
+    cutoff = timezone.now() - datetime.timedelta(minutes=max_age_minutes)
+    return SearchJob.objects.filter(status=SearchJob.STATUS_RUNNING, started_at__lt=cutoff).update(
+        status=SearchJob.STATUS_PENDING,
+        started_at=None,
+    )
+
+
+def run_search_job(job):
+    """Run providers and face matching for a claimed job, saving partial results per platform"""
+    # Imported here because views imports this module to enqueue jobs
+    from .views import build_query_embedding, iter_search_results, result_sort_key, save_search, store_search_results
+    from .search_store import photo_hash
+
+    search_data = job.search_data
+    results = []
+    try:
+        photo_bytes = None
+        if job.profile_photo:
+            with job.profile_photo.open('rb') as photo:
+                photo_bytes = photo.read()
+        query_embedding = build_query_embedding(photo_bytes)
+
+        for platform, profiles in iter_search_results(search_data, query_embedding):
+            results.extend(profiles)
+            results.sort(key=result_sort_key)
+            job.results = results
+            job.completed_platforms = job.completed_platforms + [platform]
+            job.save(update_fields=['results', 'completed_platforms'])
+
+        store_search_results(search_data, results, photo_hash(photo_bytes), job.profile_photo.name or None)
+        # Background refreshes of a stored search are not new candidates
+        is_refresh = SearchQuery.objects.filter(refresh_job=job).exists()
+        if job.profile_photo and not is_refresh:
+            save_search({**search_data, 'profile_photo': job.profile_photo.name}, job.profile_photo.name)
+
+        job.status = SearchJob.STATUS_DONE
+    except Exception as e:
+        print(f"[DEBUG] Search job {job.pk} failed: {e}")
+        traceback.print_exc()
+        job.status = SearchJob.STATUS_FAILED
+        job.error = str(e)[:500]
+
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'error', 'finished_at'])
+    return job
+
+
+def job_payload(job):
+    """JSON body for the job status endpoint"""
+    return {
+        'job_id': str(job.pk),
+        'status': job.status,
+        'finished': job.status in (SearchJob.STATUS_DONE, SearchJob.STATUS_FAILED),
+        'completed_platforms': job.completed_platforms,
+        'results': job.results,
+        'error': job.error,
+        'created_at': job.created_at.isoformat() if job.created_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+    }
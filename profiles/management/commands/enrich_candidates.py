@@ -0,0 +1,88 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from profiles.face_recognition_improved import start_background_warmup
+from profiles.http_client import RateLimiter, parse_rate_limits
+from profiles.enrichment import (
+    enrich_candidates, load_checkpoint, ENRICH_CHUNK_SIZE, ENRICH_RATE_LIMITS, ENRICH_WORKERS,
+)
+
+
+class Command(BaseCommand):
+    help = "Run the platform searches for stored candidates and save their results, resuming from a checkpoint"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--name', default='default',
+                            help='Checkpoint name; a rerun with the same name resumes where it stopped')
+        parser.add_argument('--restart', action='store_true',
+                            help='Discard the checkpoint and start from the first candidate')
+        parser.add_argument('--workers', type=int, default=ENRICH_WORKERS,
+                            help='Candidates searched at once')
+        parser.add_argument('--chunk-size', type=int, default=ENRICH_CHUNK_SIZE,
+                            help='Candidates read from the database per query')
+        parser.add_argument('--rate-limits', default='',
+                            help="Requests in flight / seconds between requests per host, "
+                                 "e.g. 'api.github.com=2/0.5,linkedin.com=1/2'")
+        parser.add_argument('--limit', type=int, default=0,
+                            help='Stop after this many candidates (0 = no limit)')
+        parser.add_argument('--retry-failed', action='store_true',
+                            help='Search the candidates that failed in earlier runs again first')
+        parser.add_argument('--include-fresh', action='store_true',
+                            help='Search candidates whose stored results are still fresh too')
+        parser.add_argument('--no-photos', action='store_true',
+                            help='Skip face matching against candidate photos')
+        parser.add_argument('--progress-every', type=int, default=25,
+                            help='Report progress every N candidates')
+
+    def handle(self, *args, **options):
+        if options['workers'] < 1 or options['chunk_size'] < 1 or options['progress_every'] < 1:
+            raise CommandError('--workers, --chunk-size and --progress-every must be at least 1')
+        try:
+            limits = {**ENRICH_RATE_LIMITS, **parse_rate_limits(options['rate_limits'])}
+        except ValueError as e:
+            raise CommandError(f"Invalid rate limit: {e}")
+        limiter = RateLimiter(limits)
+
+        checkpoint = load_checkpoint(options['name'], restart=options['restart'])
+        if checkpoint.last_candidate_id:
+            self.stdout.write(f"Resuming '{checkpoint.name}' after candidate {checkpoint.last_candidate_id} "
+                              f"({checkpoint.processed} processed, {len(checkpoint.failed_ids)} failed)")
+
+        if not options['no_photos']:
+            start_background_warmup()
+
+        started = time.time()
+        counts = {'seen': 0}
+
+        def report(candidate, status, detail):
+            counts['seen'] += 1
+            if status == 'failed':
+                self.stderr.write(f"Candidate {candidate.pk} '{candidate.name}' failed: {detail}")
+            elif options['verbosity'] > 1:
+                self.stdout.write(f"Candidate {candidate.pk} '{candidate.name}' {status}: {detail}")
+            if counts['seen'] % options['progress_every'] == 0:
+                elapsed = max(time.time() - started, 1e-6)
+                self.stdout.write(f"{counts['seen']} candidates, up to id {checkpoint.last_candidate_id} "
+                                  f"({counts['seen'] / elapsed * 60:.1f}/min)")
+
+        self.stdout.write(f"Enriching candidates with {options['workers']} worker(s), rate limits "
+                          + ', '.join(f"{host}={slots}/{interval:g}s"
+                                      for host, (slots, interval) in sorted(limits.items())))
+        stats = enrich_candidates(
+            checkpoint,
+            limiter=limiter,
+            workers=options['workers'],
+            chunk_size=options['chunk_size'],
+            use_photos=not options['no_photos'],
+            skip_fresh=not options['include_fresh'],
+            retry_failed=options['retry_failed'],
+            limit=options['limit'],
+            report=report,
+        )
+
+        for host in sorted(limiter.requests):
+            self.stdout.write(f"{host}: {limiter.requests[host]} requests, "
+                              f"{limiter.waited[host]:.1f}s spent waiting for the rate limit")
+        self.stdout.write(self.style.SUCCESS(
+            f"{stats['done']} enriched, {stats['skipped']} skipped, {stats['failed']} failed "
+            f"in {time.time() - started:.1f}s"
+        ))
@@ -0,0 +1,151 @@
+import os
+import csv
+import sys
+import json
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from profiles.forms import CandidateSearchForm
+from profiles.models import Candidate
+
+# Columns the importer understands: every form field except the photo upload
+IMPORT_FIELDS = [field for field in CandidateSearchForm.Meta.fields if field != 'profile_photo']
+
+
+def iter_csv(stream):
+    for row in csv.DictReader(stream):
+        yield {key.strip(): value for key, value in row.items() if key}
+
+
+def iter_jsonl(stream):
+    for line in stream:
+        line = line.strip()
+        if not line:
+            yield None
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield {'__error__': f"invalid JSON: {e}", '__line__': line}
+            continue
+        yield row if isinstance(row, dict) else {'__error__': 'expected a JSON object', '__line__': line}
+
+
+class Command(BaseCommand):
+    help = "Import candidates from a CSV or JSONL file (streamed, validated, inserted in batches)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV or JSONL file, or '-' for stdin")
+        parser.add_argument('--format', choices=['csv', 'jsonl'],
+                            help='Input format (default: from the file extension)')
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Rows per bulk_create and transaction')
+        parser.add_argument('--skip-existing', action='store_true',
+                            help='Skip rows whose email or social profile is already stored (or earlier in the file)')
+        parser.add_argument('--errors-file',
+                            help='Write rejected rows with their errors to this JSONL file')
+        parser.add_argument('--progress-every', type=int, default=5000,
+                            help='Report progress every N rows')
+        parser.add_argument('--encoding', default='utf-8-sig')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Validate only, write nothing')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or ('jsonl' if path.endswith(('.jsonl', '.ndjson')) else 'csv')
+        if options['batch_size'] < 1 or options['progress_every'] < 1:
+            raise CommandError('--batch-size and --progress-every must be at least 1')
+        if path != '-' and not os.path.exists(path):
+            raise CommandError(f"File not found: {path}")
+
+        self.options = options
+        self.stats = {'read': 0, 'imported': 0, 'invalid': 0, 'skipped': 0}
+        self.seen_keys = set()
+        self.started = time.time()
+        self.errors_file = open(options['errors_file'], 'w', encoding='utf-8') if options['errors_file'] else None
+
+        stream = sys.stdin if path == '-' else open(path, 'r', encoding=options['encoding'], newline='')
+        try:
+            rows = iter_jsonl(stream) if file_format == 'jsonl' else iter_csv(stream)
+            batch = []
+            # Data starts on line 2 of a CSV (after the header) and line 1 of a JSONL file
+            for line_number, row in enumerate(rows, start=2 if file_format == 'csv' else 1):
+                if row is None:
+                    continue
+                self.stats['read'] += 1
+                candidate = self.build_candidate(line_number, row)
+                if candidate is not None:
+                    batch.append(candidate)
+                if len(batch) >= options['batch_size']:
+                    self.write_batch(batch)
+                    batch = []
+                if self.stats['read'] % options['progress_every'] == 0:
+                    self.report_progress()
+            if batch:
+                self.write_batch(batch)
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+            if self.errors_file:
+                self.errors_file.close()
+
+        elapsed = time.time() - self.started
+        verb = 'Validated' if options['dry_run'] else 'Imported'
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {self.stats['imported']} of {self.stats['read']} rows in {elapsed:.1f}s "
+            f"({self.stats['invalid']} invalid, {self.stats['skipped']} skipped)"
+        ))
+
+    def build_candidate(self, line_number, row):
+        """An unsaved, normalized Candidate for a row, or None if it is invalid"""
+        if '__error__' in row:
+            self.reject(line_number, row, {'__all__': [row['__error__']]})
+            return None
+
+        data = {field: row.get(field) for field in IMPORT_FIELDS if row.get(field) not in (None, '')}
+        form = CandidateSearchForm(data=data)
+        if not form.is_valid():
+            self.reject(line_number, row, form.errors.get_json_data())
+            return None
+
+        candidate = form.save(commit=False)
+        # bulk_create skips save(), so the lookup columns are filled here
+        candidate.normalize_fields()
+        return candidate
+
+    def reject(self, line_number, row, errors):
+        self.stats['invalid'] += 1
+        if self.errors_file:
+            self.errors_file.write(json.dumps({'line': line_number, 'row': row, 'errors': errors}, default=str) + "\n")
+        elif self.stats['invalid'] <= 10:
+            self.stderr.write(f"Line {line_number}: {errors}")
+
+    def write_batch(self, batch):
+        if self.options['skip_existing']:
+            batch = self.drop_existing(batch)
+        if batch and not self.options['dry_run']:
+            with transaction.atomic():
+                Candidate.objects.bulk_create(batch, batch_size=self.options['batch_size'])
+        self.stats['imported'] += len(batch)
+
+    def drop_existing(self, batch):
+        batch_keys = set().union(*(candidate.identity_keys() for candidate in batch))
+        known = Candidate.objects.existing_identity_keys(batch_keys) | self.seen_keys
+        kept = []
+        for candidate in batch:
+            keys = candidate.identity_keys()
+            if keys & known:
+                self.stats['skipped'] += 1
+                continue
+            known |= keys
+            self.seen_keys |= keys
+            kept.append(candidate)
+        return kept
+
+    def report_progress(self):
+        elapsed = max(time.time() - self.started, 1e-6)
+        self.stdout.write(
+            f"{self.stats['read']} rows read, {self.stats['imported']} imported, "
+            f"{self.stats['invalid']} invalid, {self.stats['skipped']} skipped "
+            f"({self.stats['read'] / elapsed:.0f} rows/s)"
+        )
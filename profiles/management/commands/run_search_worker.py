@@ -0,0 +1,50 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from profiles.face_recognition_improved import start_background_warmup
+from profiles.jobs import claim_next_job, requeue_stale_jobs, run_search_job, STALE_JOB_MINUTES
+
+
+class Command(BaseCommand):
+    help = "Process queued candidate searches (SearchJob rows) in a local worker loop"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--poll-interval', type=float, default=2.0,
+                            help='Seconds to sleep when the queue is empty')
+        parser.add_argument('--once', action='store_true',
+                            help='Drain the queue and exit instead of polling forever')
+        parser.add_argument('--max-jobs', type=int, default=0,
+                            help='Exit after this many jobs (0 = no limit)')
+        parser.add_argument('--stale-minutes', type=int, default=STALE_JOB_MINUTES,
+                            help='Requeue running jobs older than this on startup')
+
+    def handle(self, *args, **options):
+        requeued = requeue_stale_jobs(options['stale_minutes'])
+        if requeued:
+            self.stdout.write(f"Requeued {requeued} stale job(s)")
+
+        # Photo searches need the face models; start loading them before the first job arrives
+        start_background_warmup()
+
+        processed = 0
+        self.stdout.write("Search worker started")
+        while True:
+            close_old_connections()
+            job = claim_next_job()
+            if job is None:
+                if options['once']:
+                    break
+                time.sleep(options['poll_interval'])
+                continue
+
+            started = time.time()
+            self.stdout.write(f"Running job {job.pk} for '{job.search_data.get('name')}'")
+            job = run_search_job(job)
+            self.stdout.write(f"Job {job.pk} {job.status} in {time.time() - started:.1f}s "
+                              f"({len(job.results)} results)")
+
+            processed += 1
+            if options['max_jobs'] and processed >= options['max_jobs']:
+                break
+
+        self.stdout.write(f"Search worker stopped after {processed} job(s)")
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0005_searchjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DiscoveredProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('profile_key', models.CharField(max_length=500, unique=True)),
+                ('platform', models.CharField(db_index=True, max_length=50)),
+                ('username', models.CharField(blank=True, default='', max_length=255)),
+                ('profile_url', models.URLField(blank=True, default='', max_length=500)),
+                ('data', models.JSONField()),
+                ('first_seen', models.DateTimeField(auto_now_add=True)),
+                ('last_seen', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SearchQuery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fingerprint', models.CharField(max_length=64, unique=True)),
+                ('search_data', models.JSONField()),
+                ('photo_hash', models.CharField(blank=True, default='', max_length=64)),
+                ('profile_photo', models.ImageField(blank=True, null=True, upload_to='search_queries/')),
+                ('hit_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('refreshed_at', models.DateTimeField(blank=True, db_index=True, null=True)),
+                ('refresh_job', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='profiles.searchjob')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ProfileScore',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('platform_display', models.CharField(blank=True, default='', max_length=50)),
+                ('confidence', models.FloatField()),
+                ('rank', models.PositiveIntegerField()),
+                ('scored_at', models.DateTimeField(auto_now=True)),
+                ('profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='scores', to='profiles.discoveredprofile')),
+                ('query', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='scores', to='profiles.searchquery')),
+            ],
+            options={
+                'ordering': ['query', 'rank'],
+                'unique_together': {('query', 'profile')},
+            },
+        ),
+    ]
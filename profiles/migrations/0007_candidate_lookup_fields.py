@@ -0,0 +1,108 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:53
+
+from django.db import migrations, models
+
+from profiles.name_matching import normalize_name
+from profiles.normalization import canonical_profile_handle, normalize_email
+
+SOCIAL_PROFILE_FIELDS = (
+    'linkedin_profile', 'github_profile', 'facebook_profile', 'instagram_profile', 'twitter_profile',
+    'youtube_profile', 'pinterest_profile', 'reddit_profile', 'medium_profile', 'quora_profile',
+)
+BATCH_SIZE = 2000
+
+
+def backfill_lookup_fields(apps, schema_editor):
+    Candidate = apps.get_model('profiles', 'Candidate')
+    handle_fields = [field.replace('_profile', '_handle') for field in SOCIAL_PROFILE_FIELDS]
+    fields = ['name_normalized', 'primary_email_normalized', 'secondary_email_normalized'] + handle_fields
+
+    batch = []
+    for candidate in Candidate.objects.order_by('pk').iterator(chunk_size=BATCH_SIZE):
+        candidate.name_normalized = normalize_name(candidate.name or '')[:255]
+        candidate.primary_email_normalized = normalize_email(candidate.primary_email)
+        candidate.secondary_email_normalized = normalize_email(candidate.secondary_email)
+        for profile_field, handle_field in zip(SOCIAL_PROFILE_FIELDS, handle_fields):
+            setattr(candidate, handle_field, canonical_profile_handle(getattr(candidate, profile_field))[:255])
+        batch.append(candidate)
+        if len(batch) >= BATCH_SIZE:
+            Candidate.objects.bulk_update(batch, fields)
+            batch = []
+    if batch:
+        Candidate.objects.bulk_update(batch, fields)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0006_discoveredprofile_searchquery_profilescore'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='candidate',
+            name='facebook_handle',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='candidate',
+            name='github_handle',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='candidate',
+            name='instagram_handle',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='candidate',
+            name='linkedin_handle',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='candidate',
+            name='medium_handle',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='candidate',
+            name='name_normalized',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='candidate',
+            name='pinterest_handle',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='candidate',
+            name='primary_email_normalized',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=254),
+        ),
+        migrations.AddField(
+            model_name='candidate',
+            name='quora_handle',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='candidate',
+            name='reddit_handle',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='candidate',
+            name='secondary_email_normalized',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=254),
+        ),
+        migrations.AddField(
+            model_name='candidate',
+            name='twitter_handle',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='candidate',
+            name='youtube_handle',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=255),
+        ),
+        migrations.RunPython(backfill_lookup_fields, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,62 @@
+import uuid
 from django.db import models
+from .name_matching import normalize_name
+from .normalization import canonical_profile_handle, normalize_email
 
 # Create your models here.
 
+# Social profile URL fields on Candidate; each has an indexed <platform>_handle shadow column
+SOCIAL_PROFILE_FIELDS = (
+    'linkedin_profile', 'github_profile', 'facebook_profile', 'instagram_profile', 'twitter_profile',
+    'youtube_profile', 'pinterest_profile', 'reddit_profile', 'medium_profile', 'quora_profile',
+)
+
+def handle_field_name(profile_field):
+    return profile_field.replace('_profile', '_handle')
+
+# Columns derived by Candidate.normalize_fields()
+NORMALIZED_FIELDS = (
+    'name_normalized', 'primary_email_normalized', 'secondary_email_normalized',
+) + tuple(handle_field_name(field) for field in SOCIAL_PROFILE_FIELDS)
+
+# Lookup columns that identify one person, per kind of identity key; names are not unique
+IDENTITY_COLUMNS = {
+    'email': ('primary_email_normalized', 'secondary_email_normalized'),
+    'handle': tuple(handle_field_name(field) for field in SOCIAL_PROFILE_FIELDS),
+}
+
+def identity_keys(email=None, profile_url=None):
+    """('email' | 'handle', normalized value) keys for a raw email and social profile URL"""
+    keys = set()
+    if normalize_email(email):
+        keys.add(('email', normalize_email(email)))
+    if canonical_profile_handle(profile_url):
+        keys.add(('handle', canonical_profile_handle(profile_url)))
+    return keys
+
+class CandidateQuerySet(models.QuerySet):
+    def matching(self, name=None, email=None, profile_url=None):
+        """Candidates with the same normalized name, email or social profile (any one of them)"""
+        conditions = models.Q(pk__in=[])
+        if name and normalize_name(name):
+            conditions |= models.Q(name_normalized=normalize_name(name))
+        for kind, value in identity_keys(email, profile_url):
+            for column in IDENTITY_COLUMNS[kind]:
+                conditions |= models.Q(**{column: value})
+        return self.filter(conditions)
+
+    def existing_identity_keys(self, keys):
+        """Which of the (kind, value) identity keys are already stored (one indexed query per column)"""
+        found = set()
+        for kind, columns in IDENTITY_COLUMNS.items():
+            values = {value for key_kind, value in keys if key_kind == kind}
+            if not values:
+                continue
+            for column in columns:
+                rows = self.filter(**{f'{column}__in': values}).values_list(column, flat=True)
+                found.update((kind, value) for value in rows)
+        return found
+
 class Candidate(models.Model):
     name = models.CharField(max_length=255)
     profile_photo = models.ImageField(upload_to='profile_photos/', blank=True, null=True)
@@ -23,9 +78,136 @@ class Candidate(models.Model):
     quora_profile = models.URLField(blank=True, null=True)
     company = models.CharField(max_length=255, blank=True, null=True)
 
+    # Normalized copies of the fields above for indexed lookups; kept in sync by save()
+    name_normalized = models.CharField(max_length=255, blank=True, default='', db_index=True)
+    primary_email_normalized = models.CharField(max_length=254, blank=True, default='', db_index=True)
+    secondary_email_normalized = models.CharField(max_length=254, blank=True, default='', db_index=True)
+    linkedin_handle = models.CharField(max_length=255, blank=True, default='', db_index=True)
+    github_handle = models.CharField(max_length=255, blank=True, default='', db_index=True)
+    facebook_handle = models.CharField(max_length=255, blank=True, default='', db_index=True)
+    instagram_handle = models.CharField(max_length=255, blank=True, default='', db_index=True)
+    twitter_handle = models.CharField(max_length=255, blank=True, default='', db_index=True)
+    youtube_handle = models.CharField(max_length=255, blank=True, default='', db_index=True)
+    pinterest_handle = models.CharField(max_length=255, blank=True, default='', db_index=True)
+    reddit_handle = models.CharField(max_length=255, blank=True, default='', db_index=True)
+    medium_handle = models.CharField(max_length=255, blank=True, default='', db_index=True)
+    quora_handle = models.CharField(max_length=255, blank=True, default='', db_index=True)
+
+    objects = CandidateQuerySet.as_manager()
+
+    def normalize_fields(self):
+        """Recompute the normalized lookup columns (save() does this; call it before bulk_create)"""
+        self.name_normalized = normalize_name(self.name or '')[:255]
+        self.primary_email_normalized = normalize_email(self.primary_email)
+        self.secondary_email_normalized = normalize_email(self.secondary_email)
+        for field in SOCIAL_PROFILE_FIELDS:
+            setattr(self, handle_field_name(field), canonical_profile_handle(getattr(self, field))[:255])
+
+    def identity_keys(self):
+        """(kind, value) keys that identify this person: normalized emails and social handles.
+
+        Reads the lookup columns, so call normalize_fields() first on unsaved candidates.
+        """
+        return {(kind, getattr(self, column))
+                for kind, columns in IDENTITY_COLUMNS.items() for column in columns if getattr(self, column)}
+
+    def save(self, *args, **kwargs):
+        self.normalize_fields()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = set(update_fields) | set(NORMALIZED_FIELDS)
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return self.name
 
+class SearchJob(models.Model):
+    """A candidate search queued for the background worker (manage.py run_search_worker)"""
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING, db_index=True)
+    search_data = models.JSONField()
+    profile_photo = models.ImageField(upload_to='search_jobs/', blank=True, null=True)
+    results = models.JSONField(default=list, blank=True)
+    completed_platforms = models.JSONField(default=list, blank=True)
+    error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ['created_at']
+
+    def __str__(self):
+        return f"{self.search_data.get('name', '')} ({self.status})"
+
+class SearchQuery(models.Model):
+    """A distinct search (normalized form fields + photo hash) and when its results were last fetched"""
+    fingerprint = models.CharField(max_length=64, unique=True)
+    search_data = models.JSONField()
+    photo_hash = models.CharField(max_length=64, blank=True, default='')
+    profile_photo = models.ImageField(upload_to='search_queries/', blank=True, null=True)
+    hit_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    refreshed_at = models.DateTimeField(blank=True, null=True, db_index=True)
+    refresh_job = models.ForeignKey(SearchJob, on_delete=models.SET_NULL, blank=True, null=True, related_name='+')
+
+    def __str__(self):
+        return f"{self.search_data.get('name', '')} ({self.fingerprint[:12]})"
+
+class DiscoveredProfile(models.Model):
+    """A social profile found by any search, stored once however many searches return it"""
+    profile_key = models.CharField(max_length=500, unique=True)
+    platform = models.CharField(max_length=50, db_index=True)
+    username = models.CharField(max_length=255, blank=True, default='')
+    profile_url = models.URLField(max_length=500, blank=True, default='')
+    data = models.JSONField()
+    first_seen = models.DateTimeField(auto_now_add=True)
+    last_seen = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.platform}: {self.username or self.profile_url}"
+
+class ProfileScore(models.Model):
+    """How well a discovered profile matched one search, in result order"""
+    query = models.ForeignKey(SearchQuery, on_delete=models.CASCADE, related_name='scores')
+    profile = models.ForeignKey(DiscoveredProfile, on_delete=models.CASCADE, related_name='scores')
+    platform_display = models.CharField(max_length=50, blank=True, default='')
+    confidence = models.FloatField()
+    rank = models.PositiveIntegerField()
+    scored_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['query', 'rank']
+        unique_together = [('query', 'profile')]
+
+    def __str__(self):
+        return f"{self.profile} → {self.confidence}"
+
+class EnrichmentCheckpoint(models.Model):
+    """Progress of a named enrich_candidates run, so a crashed run resumes where it stopped"""
+    name = models.CharField(max_length=100, unique=True)
+    # Every candidate with a pk up to this one has been processed
+    last_candidate_id = models.BigIntegerField(default=0)
+    processed = models.PositiveIntegerField(default=0)
+    failed_ids = models.JSONField(default=list, blank=True)
+    started_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        return f"{self.name} (up to candidate {self.last_candidate_id})"
+
 def twitter_search(full_name, twitter_url=None):
     profiles = []
     if twitter_url:
@@ -0,0 +1,80 @@
+import re
+import unicodedata
+from collections import namedtuple
+from functools import lru_cache
+
+# Word overlap counts for a little less than a full character match
+WORD_OVERLAP_WEIGHT = 0.8
+
+_PUNCTUATION_RE = re.compile(r'[^\w\s]')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+PreparedName = namedtuple('PreparedName', ['text', 'tokens', 'sorted_text'])
+
+
+@lru_cache(maxsize=8192)
+def normalize_name(name):
+    """Casefolded name with diacritics and punctuation removed ('José-Luis' -> 'joseluis')"""
+    decomposed = unicodedata.normalize('NFKD', name or '')
+    stripped = ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+    text = _PUNCTUATION_RE.sub('', stripped.casefold())
+    return _WHITESPACE_RE.sub(' ', text).strip()
+
+
+@lru_cache(maxsize=8192)
+def prepare_name(name):
+    """Normalized text, token set and token-sorted text of a name; cached per distinct name"""
+    text = normalize_name(name)
+    tokens = text.split()
+    return PreparedName(text, frozenset(tokens), ' '.join(sorted(tokens)))
+
+
+def lcs_length(a, b):
+    """Length of the longest common subsequence, bit-parallel (Allison-Dix / Hyyrö).
+
+    One bit per character of b is kept in a Python int, so the cost is one
+    add and a few bitwise ops per character of a rather than a full
+    dynamic-programming row.
+    """
+    if len(a) < len(b):
+        a, b = b, a
+    if not b:
+        return 0
+    masks = {}
+    for i, ch in enumerate(b):
+        masks[ch] = masks.get(ch, 0) | (1 << i)
+    full = (1 << len(b)) - 1
+    row = full
+    for ch in a:
+        matches = row & masks.get(ch, 0)
+        row = ((row + matches) | (row - matches)) & full
+    return len(b) - bin(row).count('1')
+
+
+def ratio(a, b):
+    """Normalized indel similarity 2 * LCS / (len(a) + len(b)), in [0, 1]"""
+    if not a and not b:
+        return 1.0
+    return 2 * lcs_length(a, b) / (len(a) + len(b))
+
+
+def name_similarity(first, second):
+    """Similarity in [0, 1] between two names.
+
+    The best of the plain ratio, the ratio of the word-sorted names (so
+    'Doe John' matches 'John Doe') and a weighted word overlap (so 'John'
+    partially matches 'John Doe').
+    """
+    if not first or not second:
+        return 0
+    a = prepare_name(first)
+    b = prepare_name(second)
+
+    if a.text == b.text:
+        return 1.0
+
+    similarity = max(ratio(a.text, b.text), ratio(a.sorted_text, b.sorted_text))
+    if a.tokens and b.tokens:
+        word_overlap = len(a.tokens & b.tokens) / max(len(a.tokens), len(b.tokens))
+        similarity = max(similarity, word_overlap * WORD_OVERLAP_WEIGHT)
+    return similarity
@@ -0,0 +1,52 @@
+from urllib.parse import urlparse
+
+# Host aliases that point at the same profiles
+HOST_ALIASES = {
+    'x.com': 'twitter.com',
+    'linkedin.cn': 'linkedin.com',
+}
+HOST_PREFIXES = ('www.', 'm.', 'mobile.')
+
+# First path segments that are part of the handle (linkedin.com/in/<name>, youtube.com/c/<name>, ...)
+HANDLE_PREFIXES = {'in', 'pub', 'company', 'user', 'u', 'c', 'channel', 'profile'}
+SEGMENT_ALIASES = {'u': 'user'}
+
+
+def normalize_email(email):
+    return (email or '').strip().lower()
+
+
+def canonical_profile_handle(url):
+    """'host/handle' for a social profile URL, e.g. 'https://www.GitHub.com/Octocat/' -> 'github.com/octocat'.
+
+    Scheme, www/mobile prefixes, query strings, fragments and trailing
+    paths are dropped so every spelling of a profile URL maps to one key.
+    Returns '' when url has no handle.
+    """
+    url = (url or '').strip()
+    if not url:
+        return ''
+    if '://' not in url:
+        url = 'https://' + url
+    parsed = urlparse(url)
+    host = (parsed.hostname or '').lower()
+    for prefix in HOST_PREFIXES:
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+            break
+    host = HOST_ALIASES.get(host, host)
+
+    segments = [segment for segment in parsed.path.split('/') if segment]
+    if host.endswith('.medium.com'):
+        # name.medium.com is the same profile as medium.com/@name
+        segments = ['@' + host[:-len('.medium.com')]]
+        host = 'medium.com'
+    if not host or not segments:
+        return ''
+
+    first = segments[0].lower()
+    if first in HANDLE_PREFIXES and len(segments) > 1:
+        handle = f"{SEGMENT_ALIASES.get(first, first)}/{segments[1]}"
+    else:
+        handle = segments[0]
+    return f"{host}/{handle.lower()}"
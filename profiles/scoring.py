@@ -0,0 +1,156 @@
+import numpy as np
+from .name_matching import name_similarity
+from .face_recognition_improved import SIMILARITY_THRESHOLD
+
+# Points available per feature (they add up to 100 before boosts)
+NAME_WEIGHT = 30
+IMAGE_WEIGHT = 35
+METADATA_WEIGHT = 25
+
+# Activity: followers in (-inf, 100], (100, 1000], (1000, 10000], (10000, inf)
+ACTIVITY_BINS = np.array([100, 1000, 10000])
+ACTIVITY_POINTS = np.array([1, 4, 7, 10])
+
+# Boosts for strong face matches (checked best first) and for a near-exact name
+IMAGE_BOOSTS = ((0.9, 15), (0.7, 10), (0.5, 5))
+NAME_BOOST_THRESHOLD = 25
+NAME_BOOST = 5
+
+MAX_SCORE = 100
+
+
+def _followers(profile):
+    try:
+        return float(profile.get('followers_count') or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class ScoreBatch:
+    """Confidence scores for a list of profiles, plus the feature columns behind them.
+
+    Breakdowns are only formatted when breakdown() is called.
+    """
+
+    def __init__(self, profiles, columns, scores):
+        self.profiles = profiles
+        self.columns = columns
+        self.scores = scores
+
+    def __len__(self):
+        return len(self.scores)
+
+    def breakdown(self, i):
+        """The per-feature breakdown of profile i, as the old scorer printed it"""
+        c = self.columns
+        breakdown = {}
+        if c['has_name'][i]:
+            breakdown['name'] = f"{c['name_similarity'][i]:.2f} ({c['name_score'][i]:.1f})"
+        if c['has_image'][i]:
+            if c['matched_similarity'][i] > 0:
+                breakdown['image'] = f"{c['matched_similarity'][i]:.2f} ({c['image_score'][i]:.1f})"
+            else:
+                breakdown['image'] = "No match (0.0)"
+        for field in ('location', 'company', 'profession'):
+            if c[f'{field}_checked'][i]:
+                breakdown[field] = "Match" if c[f'{field}_match'][i] else "No match"
+        if c['meta_total']:
+            breakdown['metadata'] = f"{int(c['meta_matches'][i])}/{c['meta_total']} ({c['meta_score'][i]:.1f})"
+        if c['followers'][i]:
+            breakdown['activity'] = f"{self.profiles[i].get('followers_count')} followers ({c['activity_score'][i]:.1f})"
+        breakdown['total'] = f"{self.scores[i]:.1f}"
+        breakdown['boost'] = f"+{int(c['boost'][i])}"
+        return breakdown
+
+
+def score_profiles(profiles, search_data, image_similarities=None):
+    """Score every profile against the search in one pass.
+
+    image_similarities is aligned with profiles (cosine similarity or None,
+    see compute_image_similarities). Returns a ScoreBatch whose scores are
+    identical to scoring each profile with calculate_confidence_score.
+    """
+    count = len(profiles)
+    if image_similarities is None:
+        image_similarities = [None] * count
+
+    # Name
+    search_name = search_data.get('name')
+    has_name = np.array([bool(profile.get('full_name') and search_name) for profile in profiles], dtype=bool)
+    name_sim = np.array([
+        name_similarity(profile['full_name'], search_name) if named else 0.0
+        for profile, named in zip(profiles, has_name)
+    ], dtype=np.float64)
+    name_score = name_sim * NAME_WEIGHT
+
+    # Image
+    has_image = np.array([similarity is not None for similarity in image_similarities], dtype=bool)
+    image_sim = np.array([np.nan if similarity is None else similarity for similarity in image_similarities],
+                         dtype=np.float64)
+    matched = np.where(has_image & (image_sim >= SIMILARITY_THRESHOLD), image_sim, 0.0)
+    image_score = matched * IMAGE_WEIGHT
+
+    # Metadata: each requested field either matches or not
+    columns = {}
+    meta_total = 0
+    meta_matches = np.zeros(count)
+    search_location = (search_data.get('city') or search_data.get('country') or '').lower()
+    search_company = (search_data.get('company') or '').lower()
+    search_profession = (search_data.get('profession') or '').lower()
+    checks = (
+        ('location', bool(search_data.get('city') or search_data.get('country')),
+         lambda p: _location_matches((p.get('location') or '').lower(), search_location)),
+        ('company', bool(search_data.get('company')),
+         lambda p: search_company in (p.get('company') or p.get('bio') or '').lower()),
+        ('profession', bool(search_data.get('profession')),
+         lambda p: search_profession in (p.get('bio') or '').lower()),
+    )
+    for field, requested, matches in checks:
+        match = np.fromiter((matches(profile) for profile in profiles), dtype=bool, count=count) \
+            if requested else np.zeros(count, dtype=bool)
+        checked = np.full(count, requested, dtype=bool)
+        if field == 'location' and requested:
+            # The old scorer only reported a location verdict when both sides had one
+            checked = np.array([bool(search_location and profile.get('location')) for profile in profiles],
+                               dtype=bool)
+        columns[f'{field}_match'] = match
+        columns[f'{field}_checked'] = checked
+        meta_total += requested
+        meta_matches += match
+    meta_score = (meta_matches / meta_total) * METADATA_WEIGHT if meta_total else np.zeros(count)
+
+    # Activity: log-scale tiers of follower counts
+    followers = np.array([_followers(profile) for profile in profiles], dtype=np.float64)
+    activity_score = np.where(followers != 0, ACTIVITY_POINTS[np.digitize(followers, ACTIVITY_BINS, right=True)], 0)
+
+    # Boosts
+    boost = np.select([matched > threshold for threshold, _ in IMAGE_BOOSTS],
+                      [points for _, points in IMAGE_BOOSTS], default=0)
+    boost = boost + np.where(name_score > NAME_BOOST_THRESHOLD, NAME_BOOST, 0)
+
+    totals = name_score + image_score + meta_score + activity_score
+    totals = totals + boost
+    # Python's round() keeps results identical to the per-profile scorer
+    scores = [min(round(float(total), 2), MAX_SCORE) for total in totals]
+
+    columns.update({
+        'has_name': has_name,
+        'name_similarity': name_sim,
+        'name_score': name_score,
+        'has_image': has_image,
+        'matched_similarity': matched,
+        'image_score': image_score,
+        'meta_total': meta_total,
+        'meta_matches': meta_matches,
+        'meta_score': meta_score,
+        'followers': followers,
+        'activity_score': activity_score,
+        'boost': boost,
+    })
+    return ScoreBatch(profiles, columns, scores)
+
+
+def _location_matches(profile_location, search_location):
+    if not (search_location and profile_location):
+        return False
+    return search_location in profile_location or profile_location in search_location
@@ -0,0 +1,87 @@
+import json
+import hashlib
+from django.conf import settings
+from django.core.cache import caches
+from serpapi import GoogleSearch
+from .http_client import request_slot
+
+# Which Django cache holds SerpAPI responses and how long they stay valid
+SEARCH_CACHE_ALIAS = getattr(settings, 'SEARCH_CACHE_ALIAS', 'default')
+SERPAPI_CACHE_TIMEOUT = getattr(settings, 'SERPAPI_CACHE_TIMEOUT', 6 * 3600)
+
+# Where GoogleSearch sends its requests (for per-host rate limits)
+SERPAPI_URL = 'https://serpapi.com/search'
+
+# Parameters that do not change the result set and must not end up in a cache key
+IGNORED_PARAMS = {'api_key', 'output', 'async', 'no_cache'}
+
+STATS_KEY_PREFIX = 'serpapi:stats:'
+
+
+def get_search_cache():
+    return caches[SEARCH_CACHE_ALIAS]
+
+
+def normalize_params(params):
+    """Canonical form of a SerpAPI params dict: no credentials, sorted keys, collapsed whitespace"""
+    normalized = {}
+    for key, value in params.items():
+        if key in IGNORED_PARAMS or value is None:
+            continue
+        if isinstance(value, str):
+            value = ' '.join(value.split()).lower()
+        normalized[key] = value
+    return normalized
+
+
+def params_cache_key(params):
+    payload = json.dumps(normalize_params(params), sort_keys=True, default=str)
+    return 'serpapi:' + hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _count(cache, name):
+    key = STATS_KEY_PREFIX + name
+    if not cache.add(key, 1, timeout=None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, timeout=None)
+
+
+def cached_google_search(params, timeout=None):
+    """GoogleSearch(params).get_dict() through the search cache.
+
+    Error responses are returned but never cached, so a transient SerpAPI
+    failure does not stick for the whole TTL.
+    """
+    cache = get_search_cache()
+    key = params_cache_key(params)
+
+    results = cache.get(key)
+    if results is not None:
+        _count(cache, 'hits')
+        return results
+
+    _count(cache, 'misses')
+    with request_slot(SERPAPI_URL):
+        results = GoogleSearch(params).get_dict()
+    if 'error' not in results:
+        cache.set(key, results, SERPAPI_CACHE_TIMEOUT if timeout is None else timeout)
+    return results
+
+
+def get_search_cache_stats():
+    """Hit/miss counters for cached_google_search"""
+    cache = get_search_cache()
+    hits = cache.get(STATS_KEY_PREFIX + 'hits', 0)
+    misses = cache.get(STATS_KEY_PREFIX + 'misses', 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': hits / total if total else 0.0,
+    }
+
+
+def reset_search_cache_stats():
+    get_search_cache().delete_many([STATS_KEY_PREFIX + 'hits', STATS_KEY_PREFIX + 'misses'])
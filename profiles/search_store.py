@@ -0,0 +1,142 @@
+import os
+import json
+import hashlib
+import datetime
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from .models import SearchQuery, DiscoveredProfile, ProfileScore, SearchJob
+from .jobs import serialize_search_data
+
+# Stored results younger than this are served without calling any provider
+SEARCH_RESULTS_FRESH_HOURS = float(os.environ.get("SEARCH_RESULTS_FRESH_HOURS", "24"))
+# Serve stale results immediately and queue a SearchJob to refresh them
+# (needs a running manage.py run_search_worker)
+SEARCH_BACKGROUND_REFRESH = os.environ.get("SEARCH_BACKGROUND_REFRESH", "0") == "1"
+
+# Per-search keys that are not part of the stored profile
+COMPUTED_PROFILE_FIELDS = ('confidence', 'platform_display')
+
+
+def dedup_key(profile, platform):
+    """Identity of a result profile: the same account found twice is one result"""
+    username = (profile.get('username') or '').strip().lower()
+    url = (profile.get('profile_url') or '').strip().lower()
+    return f"{platform}:{username or url}"
+
+
+def normalize_search_data(search_data):
+    """Search fields that change the results: empty values dropped, strings casefolded and trimmed"""
+    normalized = {}
+    for key, value in serialize_search_data(search_data).items():
+        if isinstance(value, str):
+            value = ' '.join(value.split()).casefold()
+        if value in (None, ''):
+            continue
+        normalized[key] = value
+    return normalized
+
+
+def photo_hash(photo_bytes):
+    return hashlib.sha256(photo_bytes).hexdigest() if photo_bytes else ''
+
+
+def query_fingerprint(search_data, photo_digest=''):
+    payload = json.dumps({'fields': normalize_search_data(search_data), 'photo': photo_digest},
+                         sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def is_fresh(query, now=None):
+    if query.refreshed_at is None:
+        return False
+    now = now or timezone.now()
+    return now - query.refreshed_at < datetime.timedelta(hours=SEARCH_RESULTS_FRESH_HOURS)
+
+
+def find_search(fingerprint):
+    """The stored SearchQuery for a fingerprint, counting the hit, or None"""
+    query = SearchQuery.objects.filter(fingerprint=fingerprint).first()
+    if query is not None:
+        SearchQuery.objects.filter(pk=query.pk).update(hit_count=F('hit_count') + 1)
+    return query
+
+
+def stored_results(query):
+    """Profiles of a stored search, in their saved result order, shaped like fresh results"""
+    results = []
+    for score in query.scores.select_related('profile').order_by('rank'):
+        profile = dict(score.profile.data)
+        profile['confidence'] = score.confidence
+        profile['platform_display'] = score.platform_display
+        results.append(profile)
+    return results
+
+
+def store_results(search_data, results, photo_digest='', photo_name=None):
+    """Save a finished search and its sorted, scored results; replaces any earlier run.
+
+    photo_name is the storage name of a photo that is already stored (see
+    views.persist_search_photo); nothing is written to storage here.
+    """
+    fingerprint = query_fingerprint(search_data, photo_digest)
+    with transaction.atomic():
+        query, _ = SearchQuery.objects.get_or_create(
+            fingerprint=fingerprint,
+            defaults={'search_data': serialize_search_data(search_data), 'photo_hash': photo_digest},
+        )
+        if photo_name and not query.profile_photo:
+            # Kept so a background refresh can rerun the face match
+            query.profile_photo = photo_name
+        query.refreshed_at = timezone.now()
+        query.save()
+
+        query.scores.all().delete()
+        scores = []
+        seen = set()
+        for rank, result in enumerate(results):
+            platform = result.get('platform_display') or result.get('platform') or ''
+            key = dedup_key(result, platform)
+            if key in seen:
+                continue
+            seen.add(key)
+            data = {k: v for k, v in result.items() if k not in COMPUTED_PROFILE_FIELDS}
+            profile, _ = DiscoveredProfile.objects.update_or_create(
+                profile_key=key,
+                defaults={
+                    'platform': platform,
+                    'username': (result.get('username') or '')[:255],
+                    'profile_url': (result.get('profile_url') or '')[:500],
+                    'data': data,
+                },
+            )
+            scores.append(ProfileScore(
+                query=query,
+                profile=profile,
+                platform_display=platform,
+                confidence=result.get('confidence') or 0,
+                rank=rank,
+            ))
+        ProfileScore.objects.bulk_create(scores)
+    return query
+
+
+def schedule_refresh(query):
+    """Queue a SearchJob that re-runs a stale search, unless one is already on its way.
+
+    Returns None when the search cannot be re-run in the background: its
+    photo was not kept (SEARCH_PHOTO_PERSIST is off), and refreshing without
+    it would store photo-less results under the photo search's fingerprint.
+    """
+    if query.photo_hash and not query.profile_photo:
+        return None
+    job = query.refresh_job
+    if job is not None and job.status in (SearchJob.STATUS_PENDING, SearchJob.STATUS_RUNNING):
+        return job
+    job = SearchJob.objects.create(
+        search_data=query.search_data,
+        profile_photo=query.profile_photo.name if query.profile_photo else None,
+    )
+    query.refresh_job = job
+    SearchQuery.objects.filter(pk=query.pk).update(refresh_job=job)
+    return job
@@ -1,3 +1,130 @@
-from django.test import TestCase
+import itertools
+from django.test import SimpleTestCase
+from .face_recognition_improved import SIMILARITY_THRESHOLD
+from .name_matching import name_similarity
+from .scoring import score_profiles
 
-# Create your tests here.
+
+def reference_confidence_score(profile, search_data, image_similarity=None):
+    """calculate_confidence_score as it was before scoring.py, one profile at a time"""
+    breakdown = {}
+
+    name_score = 0
+    if profile.get('full_name') and search_data.get('name'):
+        similarity = name_similarity(profile['full_name'], search_data['name'])
+        name_score = similarity * 30
+        breakdown['name'] = f"{similarity:.2f} ({name_score:.1f})"
+
+    image_score = 0
+    matched_similarity = 0
+    if image_similarity is not None:
+        if image_similarity >= SIMILARITY_THRESHOLD:
+            matched_similarity = image_similarity
+            image_score = matched_similarity * 35
+            breakdown['image'] = f"{matched_similarity:.2f} ({image_score:.1f})"
+        else:
+            breakdown['image'] = "No match (0.0)"
+
+    meta_score = 0
+    meta_matches = 0
+    total_meta = 0
+    if search_data.get('city') or search_data.get('country'):
+        total_meta += 1
+        profile_location = (profile.get('location') or '').lower()
+        search_location = (search_data.get('city') or search_data.get('country') or '').lower()
+        if search_location and profile_location:
+            if search_location in profile_location or profile_location in search_location:
+                meta_matches += 1
+                breakdown['location'] = "Match"
+            else:
+                breakdown['location'] = "No match"
+    if search_data.get('company'):
+        total_meta += 1
+        if search_data['company'].lower() in (profile.get('company') or profile.get('bio') or '').lower():
+            meta_matches += 1
+            breakdown['company'] = "Match"
+        else:
+            breakdown['company'] = "No match"
+    if search_data.get('profession'):
+        total_meta += 1
+        if search_data['profession'].lower() in (profile.get('bio') or '').lower():
+            meta_matches += 1
+            breakdown['profession'] = "Match"
+        else:
+            breakdown['profession'] = "No match"
+    if total_meta > 0:
+        meta_score = (meta_matches / total_meta) * 25
+        breakdown['metadata'] = f"{meta_matches}/{total_meta} ({meta_score:.1f})"
+
+    activity_score = 0
+    if profile.get('followers_count'):
+        followers = profile['followers_count']
+        if followers > 10000:
+            activity_score = 10
+        elif followers > 1000:
+            activity_score = 7
+        elif followers > 100:
+            activity_score = 4
+        else:
+            activity_score = 1
+        breakdown['activity'] = f"{followers} followers ({activity_score:.1f})"
+
+    total_score = name_score + image_score + meta_score + activity_score
+    boost = 0
+    if matched_similarity > 0.9:
+        boost = 15
+    elif matched_similarity > 0.7:
+        boost = 10
+    elif matched_similarity > 0.5:
+        boost = 5
+    if name_score > 25:
+        boost += 5
+    total_score += boost
+    total_score = min(round(total_score, 2), 100)
+    breakdown['total'] = f"{total_score:.1f}"
+    breakdown['boost'] = f"+{boost}"
+    return total_score, breakdown
+
+
+class ScoreProfilesTests(SimpleTestCase):
+    PROFILES = [
+        {'full_name': 'John Doe', 'location': 'Berlin, Germany', 'company': 'Acme', 'bio': 'Python developer',
+         'followers_count': 12000},
+        {'full_name': 'Jon Do', 'location': 'berlin', 'bio': 'Works at ACME as a data engineer', 'followers_count': 150},
+        {'full_name': 'José García', 'location': '', 'company': None, 'bio': None, 'followers_count': 0},
+        {'full_name': '', 'location': None, 'followers_count': None},
+        {'username': 'no-fields'},
+        {'full_name': 'JOHN  DOE', 'location': 'Munich', 'company': 'Other Corp', 'followers_count': 1000},
+        {'full_name': 'Doe, John', 'bio': 'developer', 'followers_count': 100},
+        {'full_name': 'Jane Smith', 'location': 'Germany', 'followers_count': 10001},
+    ]
+    SEARCHES = [
+        {'name': 'John Doe', 'city': 'Berlin', 'company': 'Acme', 'profession': 'developer'},
+        {'name': 'José Garcia', 'country': 'Germany'},
+        {'name': 'John Doe'},
+        {'name': '', 'company': 'acme'},
+        {'name': 'Jane Smith', 'city': '', 'country': 'germany', 'profession': 'engineer'},
+    ]
+    SIMILARITIES = [None, float('nan'), 0.0, 0.59, SIMILARITY_THRESHOLD, 0.7, 0.71, 0.9, 0.95, 1.0]
+
+    def test_batch_matches_per_profile_scorer(self):
+        profiles = self.PROFILES * 2
+        # Every profile meets several image similarities, including NaN (no face) and None
+        similarities = list(itertools.islice(itertools.cycle(self.SIMILARITIES), len(profiles)))
+        for search_data in self.SEARCHES:
+            for shift in range(len(self.SIMILARITIES)):
+                shifted = similarities[shift:] + similarities[:shift]
+                batch = score_profiles(profiles, search_data, shifted)
+                for i, (profile, similarity) in enumerate(zip(profiles, shifted)):
+                    expected_score, expected_breakdown = reference_confidence_score(profile, search_data, similarity)
+                    with self.subTest(search=search_data, profile=i, similarity=similarity):
+                        self.assertEqual(batch.scores[i], expected_score)
+                        self.assertEqual(batch.breakdown(i), expected_breakdown)
+
+    def test_without_image_similarities(self):
+        batch = score_profiles(self.PROFILES, self.SEARCHES[0])
+        expected = [reference_confidence_score(profile, self.SEARCHES[0])[0] for profile in self.PROFILES]
+        self.assertEqual(batch.scores, expected)
+
+    def test_empty_page(self):
+        self.assertEqual(score_profiles([], self.SEARCHES[0], []).scores, [])
@@ -1,35 +1,69 @@
 import requests
-import tempfile
 import os
 from bs4 import BeautifulSoup
-from django.shortcuts import render
+from django.shortcuts import render, get_object_or_404
+from django.http import JsonResponse, StreamingHttpResponse
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.views.decorators.http import require_GET, require_POST
 from .forms import CandidateSearchForm
-from .models import Candidate
+from .models import Candidate, SearchJob
+from .jobs import enqueue_search, job_payload
+from .search_store import (
+    dedup_key, find_search, is_fresh, photo_hash, query_fingerprint, schedule_refresh,
+    store_results, stored_results, SEARCH_BACKGROUND_REFRESH
+)
+from .http_client import http_get
+from .search_cache import cached_google_search
+from .name_matching import name_similarity
+from .scoring import score_profiles
 from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
 from PIL import Image
 import numpy as np
 from .face_recognition_improved import (
-    initialize_face_recognition, 
-    register_face_from_url, 
-    match_face_from_url, 
-    get_best_match_score,
-    clear_registered_faces,
-    is_initialized,
-    register_face_from_path,
-    match_face_from_path
+    ensure_initialized,
+    QueryEmbedding,
+    read_image_source,
+    embed_image_sources,
+    similarities_from_embeddings,
+    add_to_gallery,
+    search_gallery,
+    save_gallery,
 )
 import random
 import time
-from serpapi import GoogleSearch
-import re
 import json
+import hashlib
 from urllib.parse import urlparse, parse_qs
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 
 GITHUB_TOKEN = os.environ.get("GITHUB_TOKEN")
 TWITTER_BEARER_TOKEN = os.environ.get("TWITTER_BEARER_TOKEN")
 YOUTUBE_API_KEY = os.environ.get("YOUTUBE_API_KEY")
 SERPAPI_KEY = os.environ.get("SERPAPI_KEY")
 
+# Provider fan-out: how many providers run at once and how long a search may wait for them
+SEARCH_MAX_WORKERS = int(os.environ.get("SEARCH_MAX_WORKERS", "3"))
+SEARCH_DEADLINE_SECONDS = float(os.environ.get("SEARCH_DEADLINE_SECONDS", "30"))
+
+# How long a photo search waits for the face models if they are still loading
+FACE_MODEL_WAIT_SECONDS = float(os.environ.get("FACE_MODEL_WAIT_SECONDS", "60"))
+
+# Keep a copy of every searched photo under MEDIA_ROOT/search_photos/ (one per distinct image)
+SEARCH_PHOTO_PERSIST = os.environ.get("SEARCH_PHOTO_PERSIST", "0") == "1"
+
+# Print every profile's score breakdown (built only when this is on)
+SCORE_BREAKDOWN_DEBUG = os.environ.get("SCORE_BREAKDOWN_DEBUG", "0") == "1"
+
+# Maximum number of previously seen profiles returned from the face gallery
+GALLERY_MATCH_LIMIT = int(os.environ.get("GALLERY_MATCH_LIMIT", "10"))
+
+# GitHub user hydration: concurrent detail fetches, cached by login across searches
+GITHUB_FETCH_WORKERS = int(os.environ.get("GITHUB_FETCH_WORKERS", "5"))
+GITHUB_USER_CACHE_TIMEOUT = int(os.environ.get("GITHUB_USER_CACHE_TIMEOUT", str(24 * 3600)))
+
 HEADERS = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'}
 
 USER_AGENTS = [
@@ -44,163 +78,48 @@ print("[DEBUG] TWITTER_BEARER_TOKEN loaded:", "***" if TWITTER_BEARER_TOKEN else
 
 def calculate_string_similarity(str1, str2):
     """Improved string similarity using multiple algorithms"""
-    if not str1 or not str2:
-        return 0
-    
-    # Normalize strings
-    str1 = re.sub(r'[^\w\s]', '', str1.lower().strip())
-    str2 = re.sub(r'[^\w\s]', '', str2.lower().strip())
-    
-    if str1 == str2:
-        return 1.0
-    
-    # Use difflib for sequence matching
-    import difflib
-    similarity = difflib.SequenceMatcher(None, str1, str2).ratio()
-    
-    # Check for partial matches
-    words1 = set(str1.split())
-    words2 = set(str2.split())
-    
-    if words1 and words2:
-        word_overlap = len(words1.intersection(words2)) / max(len(words1), len(words2))
-        similarity = max(similarity, word_overlap * 0.8)
-    
-    return similarity
+    return name_similarity(str1, str2)
 
-def calculate_confidence_score(profile, search_data, uploaded_image_path=None):
-    """Improved confidence score calculation with better weighting"""
-    score = 0
-    breakdown = {}
-    
-    # Name matching (30% weight)
-    name_score = 0
-    if profile.get('full_name') and search_data.get('name'):
-        similarity = calculate_string_similarity(profile['full_name'], search_data['name'])
-        name_score = similarity * 30
-        breakdown['name'] = f"{similarity:.2f} ({name_score:.1f})"
-    
-    # Image matching (35% weight) - only if image is available
-    image_score = 0
-    image_similarity = 0
-    
-    if uploaded_image_path and profile.get('image_url'):
-        try:
-            # Download profile image to temp file if it's a URL
-            if profile['image_url'].startswith('http'):
-                with tempfile.NamedTemporaryFile(delete=False, suffix='.jpg') as temp_img:
-                    response = requests.get(profile['image_url'], timeout=10)
-                    if response.status_code == 200:
-                        temp_img.write(response.content)
-                        temp_img.flush()
-                        profile_image_path = temp_img.name
-                    else:
-                        profile_image_path = None
-            else:
-                profile_image_path = profile['image_url']
-            
-            if profile_image_path and os.path.exists(profile_image_path):
-                # Register the profile image
-                clear_registered_faces()
-                register_face_from_path(profile_image_path, profile.get('username', 'unknown'))
-                # Match against the uploaded image
-                matches = match_face_from_path(uploaded_image_path, top_k=1)
-                if matches:
-                    image_similarity = matches[0]['score']
-                    image_score = image_similarity * 35
-                    breakdown['image'] = f"{image_similarity:.2f} ({image_score:.1f})"
-                else:
-                    breakdown['image'] = "No match (0.0)"
-                
-                # Clean up temp file
-                if profile['image_url'].startswith('http') and os.path.exists(profile_image_path):
-                    os.unlink(profile_image_path)
-        except Exception as e:
-            print(f"[DEBUG] Image matching error: {e}")
-            breakdown['image'] = f"Error: {str(e)[:50]}"
-    
-    # Metadata matching (25% weight)
-    meta_score = 0
-    meta_matches = 0
-    total_meta = 0
-    
-    # Location matching
-    if search_data.get('city') or search_data.get('country'):
-        total_meta += 1
-        profile_location = (profile.get('location') or '').lower()
-        search_location = (search_data.get('city') or search_data.get('country') or '').lower()
-        
-        if search_location and profile_location:
-            if search_location in profile_location or profile_location in search_location:
-                meta_matches += 1
-                breakdown['location'] = "Match"
-            else:
-                breakdown['location'] = "No match"
-    
-    # Company matching
-    if search_data.get('company'):
-        total_meta += 1
-        profile_company = (profile.get('company') or profile.get('bio') or '').lower()
-        search_company = search_data.get('company').lower()
-        
-        if search_company in profile_company:
-            meta_matches += 1
-            breakdown['company'] = "Match"
-        else:
-            breakdown['company'] = "No match"
-    
-    # Profession matching
-    if search_data.get('profession'):
-        total_meta += 1
-        profile_bio = (profile.get('bio') or '').lower()
-        search_profession = search_data.get('profession').lower()
-        
-        if search_profession in profile_bio:
-            meta_matches += 1
-            breakdown['profession'] = "Match"
-        else:
-            breakdown['profession'] = "No match"
-    
-    if total_meta > 0:
-        meta_score = (meta_matches / total_meta) * 25
-        breakdown['metadata'] = f"{meta_matches}/{total_meta} ({meta_score:.1f})"
-    
-    # Activity score (10% weight)
-    activity_score = 0
-    if profile.get('followers_count'):
-        followers = profile['followers_count']
-        if followers > 10000:
-            activity_score = 10
-        elif followers > 1000:
-            activity_score = 7
-        elif followers > 100:
-            activity_score = 4
-        else:
-            activity_score = 1
-        breakdown['activity'] = f"{followers} followers ({activity_score:.1f})"
-    
-    total_score = name_score + image_score + meta_score + activity_score
-    
-    # Boost for strong matches
-    boost = 0
-    if image_similarity > 0.9:
-        boost = 15
-    elif image_similarity > 0.7:
-        boost = 10
-    elif image_similarity > 0.5:
-        boost = 5
+def compute_image_similarities(profiles, query_embedding):
+    """Compare every profile avatar with the query photo in one batch.
     
-    if name_score > 25:
-        boost += 5
+    Returns a list aligned with profiles holding the cosine similarity, or None
+    when there is no query, no avatar, or no face in the avatar. Avatar
+    embeddings come from the persistent embedding cache where possible.
+    """
+    if query_embedding is None or not profiles:
+        return [None] * len(profiles)
     
-    total_score += boost
-    total_score = min(round(total_score, 2), 100)
+    try:
+        embeddings = embed_image_sources([profile.get('image_url') for profile in profiles])
+        similarities = similarities_from_embeddings(embeddings, query_embedding)
+    except Exception as e:
+        print(f"[DEBUG] Image matching error: {e}")
+        return [None] * len(profiles)
     
-    breakdown['total'] = f"{total_score:.1f}"
-    breakdown['boost'] = f"+{boost}"
+    # Every face we embed goes into the gallery for future reverse lookups
+    for profile, embedding in zip(profiles, embeddings):
+        if not np.isnan(embedding[0]):
+            add_to_gallery(embedding, profile)
     
-    print(f"[DEBUG] Score breakdown for {profile.get('username')}: {breakdown}")
-    return total_score
+    return [None if np.isnan(similarity) else float(similarity) for similarity in similarities]
+
+def calculate_confidence_score(profile, search_data, image_similarity=None):
+    """Improved confidence score calculation with better weighting
+    
+    image_similarity is the precomputed cosine similarity between the profile
+    avatar and the uploaded photo (see compute_image_similarities), or None.
+    Scoring a whole result page at once is faster: see score_profile_batch.
+    """
+    return score_profile_batch([profile], search_data, [image_similarity])[0]
+
+def score_profile_batch(profiles, search_data, image_similarities=None):
+    """Confidence scores for a list of profiles, computed column-wise in one pass"""
+    batch = score_profiles(profiles, search_data, image_similarities)
+    if SCORE_BREAKDOWN_DEBUG:
+        for i, profile in enumerate(profiles):
+            print(f"[DEBUG] Score breakdown for {profile.get('username')}: {batch.breakdown(i)}")
+    return batch.scores
 
 # --- IMPROVED GITHUB SEARCH ---
 def github_search(full_name, city=None, country=None, github_url=None):
@@ -237,11 +156,55 @@ def github_search(full_name, city=None, country=None, github_url=None):
     
     return profiles[:5]  # Limit results
 
+def github_user_cache_key(username):
+    return f"github_user:{username.strip().lower()}"
+
 def fetch_github_user_details(username):
     """Fetch detailed GitHub user information"""
     if not GITHUB_TOKEN:
         return None
     
+    key = github_user_cache_key(username)
+    profile = cache.get(key)
+    if profile is None:
+        profile = _request_github_user(username)
+        if profile:
+            cache.set(key, profile, GITHUB_USER_CACHE_TIMEOUT)
+    return profile
+
+def fetch_github_users(usernames):
+    """Fetch details for many GitHub users at once, keeping the input order.
+    
+    Logins already in the cache are served from it; the rest are fetched
+    concurrently on a bounded pool instead of one request after another.
+    """
+    if not GITHUB_TOKEN:
+        return []
+    
+    logins = {}
+    for username in usernames:
+        if username:
+            logins.setdefault(github_user_cache_key(username), username)
+    if not logins:
+        return []
+    
+    found = cache.get_many(list(logins))
+    missing = [key for key in logins if key not in found]
+    
+    if missing:
+        fetched = {}
+        with ThreadPoolExecutor(max_workers=min(GITHUB_FETCH_WORKERS, len(missing)), thread_name_prefix='github-user') as executor:
+            for key, profile in zip(missing, executor.map(lambda key: _request_github_user(logins[key]), missing)):
+                if profile:
+                    fetched[key] = profile
+        if fetched:
+            cache.set_many(fetched, GITHUB_USER_CACHE_TIMEOUT)
+        found.update(fetched)
+    
+    return [dict(found[key]) for key in logins if key in found]
+
+def _request_github_user(username):
+    """Call the GitHub users API for a single login"""
     headers = {
         'Authorization': f'token {GITHUB_TOKEN}',
         'Accept': 'application/vnd.github.v3+json',
@@ -249,7 +212,7 @@ def fetch_github_user_details(username):
     }
     
     try:
-        response = requests.get(f'https://api.github.com/users/{username}', headers=headers, timeout=10)
+        response = http_get(f'https://api.github.com/users/{username}', headers=headers, timeout=10)
         if response.status_code == 200:
             user_data = response.json()
             return {
@@ -300,14 +263,12 @@ def github_api_search(full_name, city=None, country=None):
     for query in queries:
         try:
             url = f'https://api.github.com/search/users?q={requests.utils.quote(query)}&per_page=5&sort=followers'
-            response = requests.get(url, headers=headers, timeout=10)
+            response = http_get(url, headers=headers, timeout=10)
             
             if response.status_code == 200:
                 data = response.json()
-                for user in data.get('items', []):
-                    profile = fetch_github_user_details(user['login'])
-                    if profile:
-                        profiles.append(profile)
+                logins = [user['login'] for user in data.get('items', [])]
+                profiles.extend(fetch_github_users(logins))
                 
                 if profiles:
                     break  # Found results, stop searching
@@ -341,17 +302,16 @@ def github_web_search(full_name, city=None, country=None):
                 "num": 5
             }
             
-            search = GoogleSearch(params)
-            results = search.get_dict()
+            results = cached_google_search(params)
             
+            usernames = []
             for result in results.get("organic_results", []):
                 link = result.get("link")
                 if link and "github.com" in link:
                     username = link.split("github.com/")[-1].split("/")[0]
                     if username and username != "search":
-                        profile = fetch_github_user_details(username)
-                        if profile:
-                            profiles.append(profile)
+                        usernames.append(username)
+            profiles.extend(fetch_github_users(usernames))
     except Exception as e:
         print(f"[DEBUG] GitHub web search error: {e}")
     
@@ -388,8 +348,7 @@ def linkedin_search(name, linkedin_url=None, location=None, company=None):
                 "num": 3
             }
             
-            search = GoogleSearch(params)
-            results = search.get_dict()
+            results = cached_google_search(params)
             
             for result in results.get("organic_results", []):
                 link = result.get("link")
@@ -417,7 +376,7 @@ def scrape_linkedin_profile(url):
             'Connection': 'keep-alive',
         }
         
-        response = requests.get(url, headers=headers, timeout=15)
+        response = http_get(url, headers=headers, timeout=15)
         if response.status_code != 200:
             return None
         
@@ -560,7 +519,7 @@ def twitter_api_search(full_name):
     for username in username_variations:
         try:
             url = f'https://api.twitter.com/2/users/by?usernames={username}&user.fields=name,description,location,public_metrics,profile_image_url,url,verified'
-            response = requests.get(url, headers=headers, timeout=10)
+            response = http_get(url, headers=headers, timeout=10)
             
             if response.status_code == 200:
                 data = response.json()
@@ -610,8 +569,7 @@ def twitter_web_search(full_name, location=None, company=None):
             "num": 3
         }
         
-        search = GoogleSearch(params)
-        results = search.get_dict()
+        results = cached_google_search(params)
         
         for result in results.get("organic_results", []):
             link = result.get("link")
@@ -638,106 +596,343 @@ def twitter_web_search(full_name, location=None, company=None):
     
     return profiles
 
+# --- CONCURRENT PROVIDER FAN-OUT ---
+def _github_provider(search_data):
+    return github_search(
+        search_data['name'],
+        search_data.get('city'),
+        search_data.get('country'),
+        search_data.get('github_profile')
+    )
+
+def _linkedin_provider(search_data):
+    return linkedin_search(
+        search_data['name'],
+        search_data.get('linkedin_profile'),
+        search_data.get('city'),
+        search_data.get('company')
+    )
+
+def _twitter_provider(search_data):
+    return twitter_search(
+        search_data['name'],
+        search_data.get('twitter_profile'),
+        search_data.get('city'),
+        search_data.get('company')
+    )
+
+# Platform name -> provider; the order here is also the tie-break order for sorting
+SEARCH_PROVIDERS = [
+    ('GitHub', _github_provider),
+    ('LinkedIn', _linkedin_provider),
+    ('Twitter', _twitter_provider),
+]
+PLATFORM_ORDER = [platform for platform, _ in SEARCH_PROVIDERS]
+
+def run_provider_searches(search_data, deadline=SEARCH_DEADLINE_SECONDS, failed=None):
+    """Run every provider concurrently and yield (platform, profiles) as each one finishes.
+    
+    Providers still running when the deadline expires are abandoned and their
+    results are dropped, so one slow platform cannot hold the whole search
+    (deadline=None waits for all of them). The platforms that raised or were
+    abandoned are appended to the failed list, if one is given.
+    """
+    executor = ThreadPoolExecutor(max_workers=SEARCH_MAX_WORKERS, thread_name_prefix='provider-search')
+    futures = {executor.submit(provider, search_data): platform for platform, provider in SEARCH_PROVIDERS}
+    # The deadline bounds how long providers may take, not how long the caller
+    # spends on each batch: finished providers are yielded even after it passes
+    end = None if deadline is None else time.monotonic() + deadline
+    pending = set(futures)
+    try:
+        while pending:
+            timeout = None if end is None else max(0, end - time.monotonic())
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in [future for future in futures if future in done]:
+                platform = futures[future]
+                try:
+                    profiles = future.result()
+                except Exception as e:
+                    print(f"[DEBUG] {platform} search error: {e}")
+                    if failed is not None:
+                        failed.append(platform)
+                    continue
+                print(f"[DEBUG] {platform} returned {len(profiles)} profiles")
+                yield platform, profiles
+        if pending:
+            skipped = [platform for future, platform in futures.items() if future in pending]
+            print(f"[DEBUG] Search deadline of {deadline}s reached, skipping: {', '.join(skipped)}")
+            if failed is not None:
+                failed.extend(skipped)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+def result_sort_key(profile):
+    """Sort by confidence, then platform and username so arrival order never matters"""
+    platform = profile.get('platform_display')
+    platform_rank = PLATFORM_ORDER.index(platform) if platform in PLATFORM_ORDER else len(PLATFORM_ORDER)
+    return (
+        -(profile.get('confidence') or 0),
+        platform_rank,
+        (profile.get('username') or '').lower(),
+        profile.get('profile_url') or '',
+    )
+
 # --- MAIN SEARCH FUNCTION ---
+def persist_search_photo(profile_photo):
+    """Store the uploaded photo as search_photos/<sha256><ext> in the default storage.
+    
+    Content-addressed names mean identical photos are stored once and uploads
+    with the same filename never overwrite each other. Returns the storage
+    name, or None when persistence is off or fails.
+    """
+    if not SEARCH_PHOTO_PERSIST:
+        return None
+    try:
+        digest = hashlib.sha256()
+        for chunk in profile_photo.chunks():
+            digest.update(chunk)
+        extension = os.path.splitext(profile_photo.name)[1].lower() or '.jpg'
+        name = f"search_photos/{digest.hexdigest()}{extension}"
+        if not default_storage.exists(name):
+            name = default_storage.save(name, profile_photo)
+        print(f"[DEBUG] Search photo stored as: {name}")
+        return name
+    except Exception as e:
+        print(f"[DEBUG] Error storing search photo: {e}")
+        return None
+
+def build_query_embedding(photo):
+    """Embed the uploaded photo once; every profile is compared against this.
+    
+    photo may be the upload itself (decoded in memory, never written to disk)
+    or a local path. Only photo searches wait for the face models to finish
+    loading.
+    """
+    if not photo:
+        return None
+    if not ensure_initialized(timeout=FACE_MODEL_WAIT_SECONDS):
+        print("[DEBUG] Face recognition unavailable, skipping image matching")
+        return None
+    return QueryEmbedding.from_source(photo)
+
+def gallery_search_results(search_data, query_embedding):
+    """Previously seen profiles whose face matches the uploaded photo, scored like provider results"""
+    profiles = []
+    try:
+        matches = search_gallery(query_embedding, top_k=GALLERY_MATCH_LIMIT)
+    except Exception as e:
+        print(f"[DEBUG] Face gallery lookup error: {e}")
+        return profiles
+    
+    for match in matches:
+        profile = match['profile']
+        profile.pop('key', None)
+        profile.pop('seen_at', None)
+        profile['source'] = 'gallery'
+        profile['platform_display'] = profile.get('platform')
+        profiles.append(profile)
+    
+    scores = score_profile_batch(profiles, search_data, [match['score'] for match in matches])
+    for profile, score in zip(profiles, scores):
+        profile['confidence'] = score
+    return profiles
+
+def iter_search_results(search_data, query_embedding=None, deadline=SEARCH_DEADLINE_SECONDS, failed=None):
+    """Yield (platform, profiles) with deduplicated, scored profiles as each provider finishes.
+    
+    With a photo, faces already in the gallery are yielded first (as "Gallery")
+    before any external API has answered. deadline and failed are passed to
+    run_provider_searches.
+    """
+    seen_profiles = set()
+    
+    if query_embedding is not None:
+        gallery_profiles = gallery_search_results(search_data, query_embedding)
+        for profile in gallery_profiles:
+            seen_profiles.add(dedup_key(profile, profile['platform_display']))
+        print(f"[DEBUG] Face gallery returned {len(gallery_profiles)} profiles")
+        if gallery_profiles:
+            yield 'Gallery', gallery_profiles
+    
+    for platform, profiles in run_provider_searches(search_data, deadline, failed):
+        new_profiles = []
+        for profile in profiles:
+            key = dedup_key(profile, platform)
+            if key not in seen_profiles:
+                seen_profiles.add(key)
+                new_profiles.append(profile)
+        
+        image_similarities = compute_image_similarities(new_profiles, query_embedding)
+        scores = score_profile_batch(new_profiles, search_data, image_similarities)
+        for profile, score in zip(new_profiles, scores):
+            profile['confidence'] = score
+            profile['platform_display'] = platform
+        
+        yield platform, new_profiles
+    
+    if query_embedding is not None:
+        save_gallery()
+
+def lookup_stored_search(search_data, photo_digest='', force=False):
+    """The stored run of this exact search if it may be served instead of calling the providers.
+    
+    Fresh results are served as they are. Stale ones are served too when
+    background refresh is on, with a SearchJob queued to update them;
+    otherwise the caller runs the search again.
+    """
+    if force:
+        return None
+    try:
+        stored = find_search(query_fingerprint(search_data, photo_digest))
+        if stored is None or not stored.scores.exists():
+            return None
+        if is_fresh(stored):
+            return stored
+        if SEARCH_BACKGROUND_REFRESH and schedule_refresh(stored) is not None:
+            return stored
+    except Exception as e:
+        print(f"[DEBUG] Stored search lookup error: {e}")
+    return None
+
+def store_search_results(search_data, results, photo_digest='', photo_name=None):
+    """Persist a finished search so repeating it is served from the database"""
+    try:
+        store_results(search_data, results, photo_digest, photo_name)
+    except Exception as e:
+        print(f"[DEBUG] Error storing search results: {e}")
+
+def save_search(search_data, photo_name=None):
+    """Save a photo search to the database as a candidate.
+    
+    The candidate points at photo_name, the storage name the photo already has
+    (see persist_search_photo); the upload is never written a second time, so
+    with SEARCH_PHOTO_PERSIST off the candidate is saved without a photo.
+    """
+    try:
+        if search_data.get('profile_photo'):
+            Candidate.objects.create(**{**search_data, 'profile_photo': photo_name})
+    except Exception as e:
+        print(f"[DEBUG] Error saving to database: {e}")
+
 def candidate_search(request):
     """Main search function with improved error handling and accuracy"""
     form = CandidateSearchForm(request.POST or None, request.FILES or None)
     results = []
-    uploaded_image_path = None
     
+    if request.method == 'POST' and request.POST.get('mode') == 'async':
+        # Hand the search to the background worker and return straight away
+        if not form.is_valid():
+            return JsonResponse({'errors': form.errors.get_json_data()}, status=400)
+        job = enqueue_search(form.cleaned_data)
+        return JsonResponse({
+            'job_id': str(job.pk),
+            'status': job.status,
+            'status_url': reverse('search_job_status', args=[job.pk]),
+        }, status=202)
+    
+    stored_search = None
     if request.method == 'POST' and form.is_valid():
         search_data = form.cleaned_data
         print(f"[DEBUG] Search data: {search_data}")
         
-        # Initialize face recognition if needed
-        if not is_initialized():
-            try:
-                initialize_face_recognition()
-            except Exception as e:
-                print(f"[DEBUG] Face recognition initialization error: {e}")
-        
-        # Handle uploaded image
-        if search_data.get('profile_photo'):
-            try:
-                uploaded_image_path = f"uploads/{search_data['profile_photo'].name}"
-                os.makedirs("uploads", exist_ok=True)
-                with open(uploaded_image_path, 'wb+') as destination:
-                    for chunk in search_data['profile_photo'].chunks():
-                        destination.write(chunk)
-                print(f"[DEBUG] Uploaded image saved to: {uploaded_image_path}")
-            except Exception as e:
-                print(f"[DEBUG] Error saving uploaded image: {e}")
-                uploaded_image_path = None
-        
-        # Deduplication set
-        seen_profiles = set()
+        photo = search_data.get('profile_photo')
+        photo_bytes = read_image_source(photo) if photo else None
+        photo_digest = photo_hash(photo_bytes)
         
-        def dedup_key(profile, platform):
-            username = (profile.get('username') or '').strip().lower()
-            url = (profile.get('profile_url') or '').strip().lower()
-            return f"{platform}:{username or url}"
-        
-        # Search GitHub
-        print("[DEBUG] Searching GitHub...")
-        github_profiles = github_search(
-            search_data['name'],
-            search_data.get('city'),
-            search_data.get('country'),
-            search_data.get('github_profile')
-        )
-        
-        for profile in github_profiles:
-            key = dedup_key(profile, 'GitHub')
-            if key not in seen_profiles:
-                profile['confidence'] = calculate_confidence_score(profile, search_data, uploaded_image_path)
-                profile['platform_display'] = 'GitHub'
-                results.append(profile)
-                seen_profiles.add(key)
-        
-        # Search LinkedIn
-        print("[DEBUG] Searching LinkedIn...")
-        linkedin_profiles = linkedin_search(
-            search_data['name'],
-            search_data.get('linkedin_profile'),
-            search_data.get('city'),
-            search_data.get('company')
-        )
-        
-        for profile in linkedin_profiles:
-            key = dedup_key(profile, 'LinkedIn')
-            if key not in seen_profiles:
-                profile['confidence'] = calculate_confidence_score(profile, search_data, uploaded_image_path)
-                profile['platform_display'] = 'LinkedIn'
-                results.append(profile)
-                seen_profiles.add(key)
-        
-        # Search Twitter
-        print("[DEBUG] Searching Twitter...")
-        twitter_profiles = twitter_search(
-            search_data['name'],
-            search_data.get('twitter_profile'),
-            search_data.get('city'),
-            search_data.get('company')
-        )
-        
-        for profile in twitter_profiles:
-            key = dedup_key(profile, 'Twitter')
-            if key not in seen_profiles:
-                profile['confidence'] = calculate_confidence_score(profile, search_data, uploaded_image_path)
-                profile['platform_display'] = 'Twitter'
-                results.append(profile)
-                seen_profiles.add(key)
-        
-        # Sort results by confidence score
-        results.sort(key=lambda x: x.get('confidence', 0), reverse=True)
-        
-        print(f"[DEBUG] Found {len(results)} total profiles")
-        
-        # Save search to database
-        try:
-            if search_data.get('profile_photo'):
-                Candidate.objects.create(**search_data)
-        except Exception as e:
-            print(f"[DEBUG] Error saving to database: {e}")
-    
-    return render(request, 'profiles/candidate_search.html', {'form': form, 'results': results})
+        stored_search = lookup_stored_search(search_data, photo_digest, force=bool(request.POST.get('refresh')))
+        if stored_search is not None:
+            results = stored_results(stored_search)
+            print(f"[DEBUG] Served {len(results)} stored profiles for {stored_search.fingerprint[:12]}")
+        else:
+            photo_name = persist_search_photo(photo) if photo else None
+            query_embedding = build_query_embedding(photo_bytes)
+            
+            # Run all providers concurrently and score each batch as it arrives
+            for platform, profiles in iter_search_results(search_data, query_embedding):
+                results.extend(profiles)
+            
+            # Sort results by confidence score
+            results.sort(key=result_sort_key)
+            
+            print(f"[DEBUG] Found {len(results)} total profiles")
+            
+            store_search_results(search_data, results, photo_digest, photo_name)
+            save_search(search_data, photo_name)
+    
+    return render(request, 'profiles/candidate_search.html', {
+        'form': form,
+        'results': results,
+        'stored_search': stored_search,
+        'refreshing': stored_search is not None and not is_fresh(stored_search),
+    })
+
+@require_GET
+def search_job_status(request, job_id):
+    """Partial or final results of a queued search (see candidate_search's async mode)"""
+    job = get_object_or_404(SearchJob, pk=job_id)
+    return JsonResponse(job_payload(job))
+
+@require_POST
+def candidate_search_stream(request):
+    """Streaming variant of candidate_search.
+    
+    Responds with newline-delimited JSON: one "profile" event per scored card
+    (with its rendered HTML) as soon as its provider finishes, a "provider"
+    event after each platform, and a final "done" event.
+    """
+    form = CandidateSearchForm(request.POST, request.FILES)
+    if not form.is_valid():
+        return JsonResponse({'type': 'error', 'errors': form.errors.get_json_data()}, status=400)
+    
+    search_data = form.cleaned_data
+    photo = search_data.get('profile_photo')
+    # Read now: the stream runs after the view returns, when uploads may be closed
+    photo_bytes = read_image_source(photo) if photo else None
+    photo_digest = photo_hash(photo_bytes)
+    stored_search = lookup_stored_search(search_data, photo_digest, force=bool(request.POST.get('refresh')))
+    photo_name = persist_search_photo(photo) if stored_search is None and photo else None
+    
+    def event(payload):
+        return json.dumps(payload) + "\n"
+    
+    def profile_event(platform, profile):
+        return event({
+            'type': 'profile',
+            'platform': platform,
+            'confidence': profile['confidence'],
+            'html': render_to_string('profiles/_profile_card.html', {'candidate': profile, 'show_platform': True}),
+        })
+    
+    def stored_stream():
+        results = stored_results(stored_search)
+        yield event({'type': 'start', 'platforms': PLATFORM_ORDER, 'stored': True})
+        counts = {}
+        for profile in results:
+            platform = profile.get('platform_display') or ''
+            counts[platform] = counts.get(platform, 0) + 1
+            yield profile_event(platform, profile)
+        for platform, count in counts.items():
+            yield event({'type': 'provider', 'platform': platform, 'count': count})
+        yield event({'type': 'done', 'total': len(results), 'stored': True})
+    
+    def stream():
+        yield event({'type': 'start', 'platforms': PLATFORM_ORDER})
+        query_embedding = build_query_embedding(photo_bytes)
+        results = []
+        for platform, profiles in iter_search_results(search_data, query_embedding):
+            for profile in profiles:
+                yield profile_event(platform, profile)
+            results.extend(profiles)
+            yield event({'type': 'provider', 'platform': platform, 'count': len(profiles)})
+        results.sort(key=result_sort_key)
+        store_search_results(search_data, results, photo_digest, photo_name)
+        save_search(search_data, photo_name)
+        yield event({'type': 'done', 'total': len(results)})
+    
+    response = StreamingHttpResponse(stored_stream() if stored_search else stream(),
+                                     content_type='application/x-ndjson')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # don't let nginx buffer the stream
+    return response
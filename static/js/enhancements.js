@@ -5,6 +5,7 @@ document.addEventListener('DOMContentLoaded', function() {
     initializeFormEnhancements();
     initializeFileUpload();
     initializeSearchButton();
+    initializeStreamingSearch();
     initializeAnimations();
     initializeTooltips();
 });
@@ -126,6 +127,105 @@ function initializeSearchButton() {
     });
 }
 
+function initializeStreamingSearch() {
+    const searchForm = document.getElementById('searchForm');
+    const streamUrl = searchForm && searchForm.dataset.streamUrl;
+    
+    // Fall back to the normal full-page POST on browsers without streaming fetch
+    if (!streamUrl || !window.fetch || !window.ReadableStream || !window.TextDecoder) return;
+    
+    searchForm.addEventListener('submit', function(e) {
+        e.preventDefault();
+        runStreamingSearch(searchForm, streamUrl).catch(function(error) {
+            console.error('Streaming search failed, falling back to page submit:', error);
+            searchForm.submit();
+        });
+    });
+}
+
+async function runStreamingSearch(searchForm, streamUrl) {
+    const container = document.getElementById('streamResults');
+    const list = document.getElementById('streamResultsList');
+    const status = document.getElementById('streamStatus');
+    const empty = document.getElementById('streamEmpty');
+    
+    const response = await fetch(streamUrl, {
+        method: 'POST',
+        body: new FormData(searchForm),
+        credentials: 'same-origin'
+    });
+    
+    // Validation errors are rendered by the regular view
+    if (!response.ok || !response.body) {
+        throw new Error(`HTTP ${response.status}`);
+    }
+    
+    // Results now arrive incrementally, so the blocking overlay is no longer needed
+    document.querySelectorAll('.loading-overlay').forEach(overlay => overlay.remove());
+    document.querySelectorAll('.results-section:not(#streamResults)').forEach(section => section.remove());
+    list.innerHTML = '';
+    empty.style.display = 'none';
+    container.style.display = 'block';
+    
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let total = 0;
+    const finished = [];
+    
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        
+        buffer += decoder.decode(value, { stream: true });
+        const lines = buffer.split('\n');
+        buffer = lines.pop();
+        
+        lines.filter(line => line.trim()).forEach(line => {
+            const message = JSON.parse(line);
+            if (message.type === 'profile') {
+                insertProfileCard(list, message.html, message.confidence);
+                total += 1;
+                status.textContent = `Found ${total} potential matches so far...`;
+            } else if (message.type === 'provider') {
+                finished.push(message.platform);
+                status.textContent = `Found ${total} potential matches so far (${finished.join(', ')} done)...`;
+            } else if (message.type === 'done') {
+                status.textContent = `Found ${message.total} potential matches across platforms`;
+                if (!message.total) {
+                    empty.style.display = 'block';
+                }
+            }
+        });
+    }
+    
+    resetSearchButton();
+}
+
+function insertProfileCard(list, html, confidence) {
+    // Keep the list sorted by confidence (highest first) as cards arrive
+    const template = document.createElement('template');
+    template.innerHTML = html.trim();
+    const card = template.content.firstElementChild;
+    card.dataset.confidence = confidence;
+    card.classList.add('animate-in');
+    
+    const next = Array.from(list.children).find(
+        existing => parseFloat(existing.dataset.confidence) < confidence
+    );
+    list.insertBefore(card, next || null);
+}
+
+function resetSearchButton() {
+    const searchBtn = document.getElementById('searchBtn');
+    const searchText = document.getElementById('searchText');
+    const searchLoading = document.getElementById('searchLoading');
+    
+    if (searchBtn) searchBtn.disabled = false;
+    if (searchText) searchText.style.display = 'inline';
+    if (searchLoading) searchLoading.style.display = 'none';
+}
+
 function initializeAnimations() {
     // Intersection Observer for scroll animations
     const observerOptions = {